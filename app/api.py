@@ -0,0 +1,239 @@
+"""
+Read-only HTTP API over the current snapshot, for services that need the same frames as
+ the app. Responses are column and season range projections of the snapshot, encoded as
+ Arrow IPC, Parquet or JSON, and carry an ETag derived from the snapshot version so
+ unchanged data is answered with a 304.
+
+    GET /seasons?columns=season,price&start=1000&end=2000
+    GET /floods?format=json
+    GET /plots?source=pinto&format=parquet
+    GET /plots?as_of=2500  # as recorded at season 2500, see `history`
+
+Run it on its own with `uv run python app/api.py [port]`, or next to the app by setting
+ `PINTO_API_PORT`. It only listens on localhost unless `PINTO_API_HOST` is set, e.g. to
+ `0.0.0.0` to serve other hosts.
+"""
+
+import hashlib
+import os
+import sys
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import NamedTuple
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import streamlit as st
+from data import Data, gather_data
+from flood_store import calculate_flood_details
+from history import snapshot_history
+from sources import DEFAULT_SOURCE, SOURCES
+
+API_PORT = 8600
+API_HOST = os.environ.get("PINTO_API_HOST", "127.0.0.1")
+MAX_RESPONSES = 128  # encoded bodies kept per process
+
+FORMATS = {
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+    "json": "application/json",
+}
+
+
+class Dataset(NamedTuple):
+    frame: Callable[[Data], pd.DataFrame]
+    range_column: str  # `start` and `end` filter on this season column
+
+
+def _floods(data: Data) -> pd.DataFrame:
+    floods = calculate_flood_details(data.df.copy(deep=False))
+    return floods.rename_axis("flood").reset_index()
+
+
+DATASETS = {
+    "seasons": Dataset(lambda data: data.df, "season"),
+    "floods": Dataset(_floods, "raining_season"),
+    "plots": Dataset(lambda data: data.plots, "season"),
+}
+
+
+def project(
+    df: pd.DataFrame,
+    range_column: str,
+    columns: list[str] | None = None,
+    start: int | None = None,
+    end: int | None = None,
+) -> pd.DataFrame:
+    """The rows with `start <= range_column < end` of the given columns."""
+
+    if unknown := set(columns or []) - set(df.columns):
+        raise ValueError(f"unknown columns: {', '.join(sorted(unknown))}")
+
+    mask = pd.Series(True, index=df.index)
+    if start is not None:
+        mask &= df[range_column] >= start
+    if end is not None:
+        mask &= df[range_column] < end
+    return df.loc[mask, columns or list(df.columns)]
+
+
+def encode(df: pd.DataFrame, format: str) -> bytes | pa.Buffer:
+    if format == "json":
+        return df.to_json(orient="records", date_format="iso").encode()
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    if format == "parquet":
+        pq.write_table(table, sink, compression="zstd")
+    else:
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+    return sink.getvalue()
+
+
+class ResponseCache:
+    """A thread-safe LRU of encoded bodies keyed by ETag."""
+
+    def __init__(self, maxsize: int = MAX_RESPONSES):
+        self.maxsize = maxsize
+        self._bodies: OrderedDict[str, bytes | pa.Buffer] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, etag: str, build: Callable[[], bytes | pa.Buffer]):
+        with self._lock:
+            if etag in self._bodies:
+                self._bodies.move_to_end(etag)
+                return self._bodies[etag]
+
+        body = build()
+        with self._lock:
+            self._bodies[etag] = body
+            while len(self._bodies) > self.maxsize:
+                self._bodies.popitem(last=False)
+        return body
+
+
+def _upstream_errors() -> tuple[type[Exception], ...]:
+    # only evaluated once a fetch failed, by when subgrounds is already imported
+    import httpx
+    from subgrounds.errors import SubgroundsError
+
+    return (OSError, httpx.HTTPError, SubgroundsError)
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Whether an `If-None-Match` list of ETags matches `etag`, weakly."""
+
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+
+class SnapshotHandler(BaseHTTPRequestHandler):
+    bodies = ResponseCache()
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+        dataset = DATASETS.get(url.path.strip("/"))
+        source = SOURCES.get(query.get("source", DEFAULT_SOURCE))
+        if dataset is None or source is None:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+
+        format = query.get("format") or next(
+            (
+                f
+                for f, mime in FORMATS.items()
+                if mime in self.headers.get("Accept", "")
+            ),
+            "arrow",
+        )
+        if format not in FORMATS:
+            self.send_error(HTTPStatus.BAD_REQUEST, f"unknown format: {format}")
+            return
+
+        try:
+            data = gather_data(source)
+        except _upstream_errors() as e:
+            self.send_error(HTTPStatus.BAD_GATEWAY, f"subgraph unavailable: {e}")
+            return
+
+        history = snapshot_history(source)
+        try:
+            as_of = int(query["as_of"]) if "as_of" in query else None
+            version = (
+                data.version if as_of is None else history.version_at(as_of).version
+            )
+        except ValueError as e:
+            self.send_error(HTTPStatus.BAD_REQUEST, str(e))
+            return
+        except KeyError as e:
+            self.send_error(HTTPStatus.NOT_FOUND, e.args[0])
+            return
+
+        def _frame() -> pd.DataFrame:
+            if as_of is None:
+                return dataset.frame(data)
+            snapshot = history.as_of(as_of)
+            return dataset.frame(
+                data._replace(
+                    df=snapshot.df, plots=snapshot.plots, version=snapshot.version
+                )
+            )
+
+        request = "&".join(f"{k}={v}" for k, v in sorted(query.items()))
+        digest = hashlib.sha256(f"{version}|{url.path}|{request}|{format}".encode())
+        etag = f'"{digest.hexdigest()[:32]}"'
+
+        if etag_matches(self.headers.get("If-None-Match", ""), etag):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        try:
+            columns = query["columns"].split(",") if query.get("columns") else None
+            start = int(query["start"]) if "start" in query else None
+            end = int(query["end"]) if "end" in query else None
+            body = self.bodies.get(
+                etag,
+                lambda: encode(
+                    project(_frame(), dataset.range_column, columns, start, end),
+                    format,
+                ),
+            )
+        except ValueError as e:
+            self.send_error(HTTPStatus.BAD_REQUEST, str(e))
+            return
+
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", FORMATS[format])
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        # arrow buffers are written straight from their memory
+        self.wfile.write(memoryview(body))
+
+
+def serve(port: int = API_PORT, host: str = API_HOST):
+    ThreadingHTTPServer((host, port), SnapshotHandler).serve_forever()
+
+
+@st.cache_resource
+def start_api(port: int = API_PORT, host: str = API_HOST) -> ThreadingHTTPServer:
+    """Serves the API from a background thread of the app process, once."""
+
+    server = ThreadingHTTPServer((host, port), SnapshotHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    serve(int(sys.argv[1]) if len(sys.argv) > 1 else API_PORT)
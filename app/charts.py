@@ -0,0 +1,85 @@
+"""
+Pre-rendered chart cache. Figures only change once per data refresh, so they are kept per
+ (snapshot version, chart id, parameters) and shared across sessions: plotly figures as
+ built, since streamlit serializes them directly, and altair charts as vega-lite specs.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import TYPE_CHECKING, TypeVar
+
+import streamlit as st
+
+# each page only pays for the plotting library it actually uses
+if TYPE_CHECKING:
+    import altair as alt
+    import plotly.graph_objects as go
+
+T = TypeVar("T")
+
+MAX_CHARTS = 64
+
+
+class ChartCache:
+    """A thread-safe LRU of built charts."""
+
+    def __init__(self, maxsize: int = MAX_CHARTS):
+        self.maxsize = maxsize
+        self._specs: OrderedDict[Hashable, object] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, build: Callable[[], T]) -> T:
+        with self._lock:
+            if key in self._specs:
+                self._specs.move_to_end(key)
+                return self._specs[key]
+
+        # build outside of the lock, a duplicate build on a race is harmless
+        spec = build()
+        with self._lock:
+            self._specs[key] = spec
+            self._specs.move_to_end(key)
+            while len(self._specs) > self.maxsize:
+                self._specs.popitem(last=False)
+        return spec
+
+
+@st.cache_resource
+def chart_cache() -> ChartCache:
+    return ChartCache()
+
+
+def plotly_chart(
+    version: str,
+    chart_id: str,
+    build: Callable[[], go.Figure],
+    params: tuple = (),
+    **kwargs,
+):
+    """Same as `st.plotly_chart`, but `build` only runs on a cache miss.
+
+    The cached figure is passed as is, which streamlit only serializes (a dict or json
+     spec would be validated into a new figure on every rerun).
+    """
+
+    fig = chart_cache().get((version, chart_id, params), build)
+    return st.plotly_chart(fig, **kwargs)
+
+
+def altair_chart(
+    version: str,
+    chart_id: str,
+    build: Callable[[], alt.TopLevelMixin],
+    params: tuple = (),
+    **kwargs,
+):
+    """Same as `st.altair_chart`, but `build` only runs on a cache miss and the cached
+    vega-lite spec is sent as is.
+    """
+
+    spec = chart_cache().get((version, chart_id, params), lambda: build().to_json())
+    return st.vega_lite_chart(json.loads(spec), **kwargs)
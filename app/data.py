@@ -1,214 +1,406 @@
-from typing import NamedTuple
+from __future__ import annotations
+
+import json
+import urllib.request
+from typing import TYPE_CHECKING, NamedTuple
 
 import pandas as pd
-import pandera as pa
 import streamlit as st
-from pandera.typing import DataFrame, Series
-from subgrounds import Subgrounds
+from flood_store import flood_state
+from history import snapshot_history
+from ingest import SnapshotGaps, collect, reconcile_snapshots, stream_pages
+from pagination import Cursor, cursor_where, iter_cursor_pages
+from query_cache import ENTITY_TTLS, SEASON_BLOCK, query_cache, season_ttl
+from sources import RESIDENT_SNAPSHOTS, Source, resident_stores
+from sync import PlotStore, watermark
+
+# pandera and subgrounds are slow to import and only needed once data is fetched (or
+# type checked), which keeps importing the data layer cheap
+if TYPE_CHECKING:
+    from pandera.typing import DataFrame
+    from schemas import PintoSchema, PlotsSchema
+    from subgrounds import FieldPath
 
-# PINTO = "https://graph.pinto.money"
-PINTOSTALK = "https://graph.pinto.money/pintostalk"
-EXCHANGE = "https://graph.pinto.money/exchange"
-PROTOCOL = "0xD1A0D188E861ed9d15773a2F3574a2e94134bA8f"
 ALL = 100000
+HEAD_INTERVAL = 30  # seconds between head checks
 
+HEAD_QUERY = """
+{
+  seasons(first: 1, orderBy: season, orderDirection: desc) { season createdAt }
+  _meta { block { number } }
+}
+"""
 
-class PintoSchema(pa.DataFrameModel):
-    datetime: Series[pd.DatetimeTZDtype]
-    timestamp: Series[int]
-    season: Series[int]
-    raining: Series[bool]
-    price: Series[float]
-    flood_silo_pinto: Series[float]
-    flood_field_pinto: Series[float]
-    twa_delta_pinto: Series[float]
-    delta_pinto: Series[float]
-    gm_reward: Series[float]
-    twa_minted_pinto: Series[float]
-    market_cap: Series[float]
-    pod_rate: Series[float]
-    temperature: Series[int]
-    pod_index: Series[float]
-    harvestable_index: Series[float]
-    sown_pinto: Series[float]
-    harvested_pods: Series[float]
-    blocks_to_soil_sold_out: Series[int]
-    delta_harvestable_index: Series[float]
-    delta_harvestable_pods: Series[float]
-    delta_harvested_pods: Series[float]
-    delta_issued_soil: Series[float]
-    delta_number_of_sowers: Series[int]
-    delta_number_of_sows: Series[int]
-    delta_pod_index: Series[float]
-    delta_pod_rate: Series[float]
-    delta_real_rate_of_return: Series[float]
-    delta_sown_pinto: Series[float]
-    delta_temperature: Series[int]
-    delta_unharvestable_pods: Series[float]
-    delta_soil: Series[float]
-    cum_number_of_sows: Series[int]
-    cum_issued_soil: Series[float]
-    cum_number_of_sowers: Series[int]
-    harvestable_pods: Series[float]
-    soil_sold_out: Series[bool]
-    soil: Series[float]
-    real_rate_of_return: Series[float]
-    unharvestable_pods: Series[float]
-    cum_pinto_minted: Series[float]
-    active_silo_farmers: Series[int]
-    delta_active_silo_farmers: Series[int]
-    delta_pinto_minted: Series[float]
-    delta_grown_stalk_per_season: Series[float]
-    delta_germinating_stalk: Series[float]
-    delta_deposited_pdv: Series[float]
-    delta_unclaimed_stalk: Series[float]
-    delta_roots: Series[float]
-    delta_stalk: Series[float]
-    deposited_pdv: Series[float]
-    germinating_stalk: Series[float]
-    grown_stalk_per_season: Series[float]
-    unclaimed_stalk: Series[float]
-    roots: Series[float]
-    stalk: Series[float]
-
-    class Config:
-        dtype_backend = "pyarrow"
-
-
-class PlotsSchema(pa.DataFrameModel):
-    updated_at: Series[int]
-    created_at: Series[int]
-    source: Series[str]
-    season: Series[int]
-    pods: Series[float]
-    index: Series[int]
-    harvestable_pods: Series[float]
-    harvested_pods: Series[float]
-    fully_harvested: Series[bool]
-    beans_per_pod: Series[float]
-    farmer: Series[str]
-
-    class Config:
-        dtype_backend = "pyarrow"
+
+class SeasonHead(NamedTuple):
+    season: int
+    created_at: int
+    block: int  # the subgraph's indexed block
 
 
 class Data(NamedTuple):
     df: DataFrame[PintoSchema]
     plots: DataFrame[PlotsSchema]
+    gaps: dict[str, SnapshotGaps]
+    version: str  # changes whenever a new season lands or plots are updated
+    source: Source
+    head: SeasonHead | None = None  # set by `gather_data`
 
     @property
     def latest_season(self):
         return self.df.iloc[-1]
 
+    @property
+    def is_raining(self) -> bool:
+        return bool(self.df["raining"].iat[-1])
+
+    @property
+    def seasons_since_rain(self) -> int | None:
+        seasons = self.df["seasons_since_rain"].iat[-1]
+        return None if pd.isna(seasons) else int(seasons)
+
+
+# columns stored on-chain with 6 decimals
+SEASON_DECIMALS = [
+    "flood_silo_pinto",
+    "flood_field_pinto",
+    "twa_delta_pinto",
+    "delta_pinto",
+    "gm_reward",
+    "twa_minted_pinto",
+    "pod_index",
+    "harvestable_index",
+    "sown_pinto",
+    "harvested_pods",
+    "delta_harvestable_index",
+    "delta_harvestable_pods",
+    "delta_harvested_pods",
+    "delta_issued_soil",
+    "delta_pod_index",
+    "delta_sown_pinto",
+    "delta_unharvestable_pods",
+    "delta_soil",
+    "cum_issued_soil",
+    "harvestable_pods",
+    "soil",
+    "unharvestable_pods",
+    "cum_pinto_minted",
+    "delta_pinto_minted",
+    "delta_grown_stalk_per_season",
+    "delta_germinating_stalk",
+    "delta_deposited_pdv",
+    "delta_unclaimed_stalk",
+    "delta_stalk",
+    "deposited_pdv",
+    "germinating_stalk",
+    "grown_stalk_per_season",
+    "unclaimed_stalk",
+    "stalk",
+    "roots",
+    "delta_roots",
+]
+PLOT_DECIMALS = [
+    "pods",
+    "pinto_spent_per_pod",
+    "index",
+    "harvestable_pods",
+    "harvested_pods",
+]
+PLOT_TIMESTAMPS = ["updated_at", "created_at", "harvest_at"]
+
+
+# the (field path, column) pairs queried for each entity, kept as functions so the same
+# columns can be requested from a differently filtered query (e.g. gap backfills)
+def seasons_columns(seasons: FieldPath) -> list[tuple[FieldPath, str]]:
+    return [
+        (seasons.createdAt, "timestamp"),
+        (seasons.season, "season"),
+        (seasons.raining, "raining"),
+        (seasons.price, "price"),
+        (seasons.floodSiloBeans, "flood_silo_pinto"),
+        (seasons.floodFieldBeans, "flood_field_pinto"),
+        (seasons.deltaB, "twa_delta_pinto"),
+        (seasons.deltaBeans, "delta_pinto"),
+        (seasons.incentiveBeans, "gm_reward"),
+        (seasons.rewardBeans, "twa_minted_pinto"),
+        (seasons.marketCap, "market_cap"),
+    ]
+
+
+def silos_columns(silos: FieldPath) -> list[tuple[FieldPath, str]]:
+    return [
+        (silos.beanMints, "cum_pinto_minted"),
+        (silos.activeFarmers, "active_silo_farmers"),
+        # (silos.avgGrownStalkPerBdvPerSeason, "avg_grown_stalk_per_bdv"),
+        # (silos.beanToMaxLpGpPerBdvRatio, ),
+        # (silos.createdAt, ),
+        (silos.deltaActiveFarmers, "delta_active_silo_farmers"),
+        # (silos.deltaAvgGrownStalkPerBdvPerSeason, ),
+        (silos.deltaBeanMints, "delta_pinto_minted"),
+        (silos.deltaGrownStalkPerSeason, "delta_grown_stalk_per_season"),
+        (silos.deltaGerminatingStalk, "delta_germinating_stalk"),
+        (silos.deltaDepositedBDV, "delta_deposited_pdv"),
+        (silos.deltaPlantableStalk, "delta_unclaimed_stalk"),
+        (silos.deltaRoots, "delta_roots"),
+        (silos.deltaStalk, "delta_stalk"),
+        (silos.depositedBDV, "deposited_pdv"),
+        (silos.germinatingStalk, "germinating_stalk"),
+        (silos.grownStalkPerSeason, "grown_stalk_per_season"),
+        # (silos.id, ),
+        (silos.plantableStalk, "unclaimed_stalk"),
+        (silos.season, "silo_season"),
+        (silos.roots, "roots"),  # uncompounded stalk
+        (silos.stalk, "stalk"),
+        (silos.updatedAt, "silo_updated_at"),
+    ]
+
 
-@st.cache_data(ttl="30min", show_spinner="Getting Data..")
-def gather_data() -> Data:
-    """This function loads the subgraph and queries the data. Subgrounds automatically
-    handles the pagination for us.
+def fields_columns(fields: FieldPath) -> list[tuple[FieldPath, str]]:
+    return [
+        # (fields.id, ""),
+        (fields.season, "field_season"),
+        (fields.podRate, "pod_rate"),
+        (fields.temperature, "temperature"),
+        (fields.podIndex, "pod_index"),
+        (fields.harvestableIndex, "harvestable_index"),
+        (fields.sownBeans, "sown_pinto"),
+        (fields.harvestedPods, "harvested_pods"),
+        # (fields.createdAt, ""),
+        # (fields.caseId, ""),
+        (fields.blocksToSoldOutSoil, "blocks_to_soil_sold_out"),
+        (fields.deltaHarvestableIndex, "delta_harvestable_index"),
+        (fields.deltaHarvestablePods, "delta_harvestable_pods"),
+        (fields.deltaHarvestedPods, "delta_harvested_pods"),
+        (fields.deltaIssuedSoil, "delta_issued_soil"),
+        (fields.deltaNumberOfSowers, "delta_number_of_sowers"),
+        (fields.deltaNumberOfSows, "delta_number_of_sows"),
+        (fields.deltaPodIndex, "delta_pod_index"),
+        (fields.deltaPodRate, "delta_pod_rate"),
+        (fields.deltaRealRateOfReturn, "delta_real_rate_of_return"),
+        (fields.deltaSownBeans, "delta_sown_pinto"),
+        (fields.deltaTemperature, "delta_temperature"),
+        (fields.deltaUnharvestablePods, "delta_unharvestable_pods"),
+        (fields.deltaSoil, "delta_soil"),
+        (fields.numberOfSows, "cum_number_of_sows"),
+        (fields.issuedSoil, "cum_issued_soil"),
+        (fields.numberOfSowers, "cum_number_of_sowers"),
+        (fields.harvestablePods, "harvestable_pods"),
+        (fields.soilSoldOut, "soil_sold_out"),
+        (fields.soil, "soil"),
+        (fields.realRateOfReturn, "real_rate_of_return"),
+        (fields.unharvestablePods, "unharvestable_pods"),
+        (fields.updatedAt, "field_updated_at"),
+    ]
+
+
+def plots_columns(plots: FieldPath) -> list[tuple[FieldPath, str]]:
+    return [
+        (plots.id, "id"),
+        (plots.updatedAt, "updated_at"),
+        (plots.createdAt, "created_at"),
+        (plots.harvestAt, "harvest_at"),
+        (plots.source, "source"),
+        (plots.season, "season"),
+        (plots.pods, "pods"),
+        (plots.index, "index"),
+        (plots.harvestablePods, "harvestable_pods"),
+        (plots.harvestedPods, "harvested_pods"),
+        (plots.fullyHarvested, "fully_harvested"),
+        (plots.beansPerPod, "pinto_spent_per_pod"),
+        (plots.farmer.id, "farmer"),
+    ]
+
+
+def plot_store(source: Source) -> PlotStore:
+    """The plots frame outlives cached data so refreshes only sync what changed."""
+
+    return resident_stores().get(source.name, "plots", PlotStore)
+
+
+@st.cache_resource
+def last_heads() -> dict[str, SeasonHead]:
+    """The last head polled from each source, by source name."""
+
+    return {}
+
+
+@st.cache_data(ttl=HEAD_INTERVAL, show_spinner=False)
+def season_head(source: Source) -> SeasonHead:
+    """The latest season of a source, polled with a single small query so a full sync
+    only happens once a new season lands.
+
+    While the subgraph can't be reached the last known head is returned, so pages keep
+    serving the cached snapshot until the next poll.
     """
 
+    request = urllib.request.Request(
+        source.pintostalk,
+        data=json.dumps({"query": HEAD_QUERY}).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            data = json.load(response)["data"]
+    # `HTTPError` is a `URLError`, socket timeouts are `OSError`s
+    except (OSError, ValueError, KeyError):
+        if source.name in last_heads():
+            return last_heads()[source.name]
+        raise
+
+    season = data["seasons"][0]
+    head = SeasonHead(
+        int(season["season"]),
+        int(season["createdAt"]),
+        data["_meta"]["block"]["number"],
+    )
+    last_heads()[source.name] = head
+    return head
+
+
+def gather_data(source: Source) -> Data:
+    """The data of a source as of its current season, synced only when the head season
+    advances. Plots sown during a season are picked up with the next one.
+    """
+
+    head = season_head(source)
+    data = _gather_data(source, head.season)
+    # the plot store (and what subscribes to it) may have been evicted since the
+    # snapshot was cached, it then picks up from the snapshot's plots
+    plot_store(source).seed(data.plots)
+    resident_stores().snapshot(
+        source.name,
+        data.version,
+        lambda: int(
+            data.df.memory_usage(deep=True).sum()
+            + data.plots.memory_usage(deep=True).sum()
+        ),
+    )
+    return data._replace(head=head)
+
+
+@st.cache_data(max_entries=RESIDENT_SNAPSHOTS, show_spinner="Getting Data..")
+def _gather_data(source: Source, head: int) -> Data:
+    """This function loads the subgraph and queries the data. Subgrounds handles the
+    pagination for seasonal data while plots are paged by cursor, and each page is
+    decoded as soon as it arrives. Every query goes through the local query cache.
+    """
+
+    from subgrounds import Subgrounds
+
     with Subgrounds() as sg:
-        pintostalk = sg.load_subgraph(PINTOSTALK)
+        pintostalk = sg.load_subgraph(source.pintostalk)
+        cache = query_cache()
         args = {"first": ALL, "orderBy": "season", "orderDirection": "asc"}
-        seasons = pintostalk.Query.seasons(where={"createdAt_gt": 0}, **args)
-        fields = pintostalk.Query.fieldHourlySnapshots(
-            where={"field": PROTOCOL}, **args
+
+        # each entity is streamed page by page, decoding every page into an arrow
+        # record batch before the next one is requested, unless the query is cached
+        def _stream(
+            entity: str, where: dict, columns_of, ttl: float | None
+        ) -> pd.DataFrame:
+            query_args = {**args, "where": where}
+            query = getattr(pintostalk.Query, entity)(**query_args)
+            fpaths, columns = zip(*columns_of(query))
+            return cache.fetch(
+                source.pintostalk,
+                entity,
+                # the open block is keyed on the head, so a new season refetches it
+                query_args if ttl is None else {**query_args, "head": head},
+                columns,
+                lambda: collect(
+                    stream_pages(sg, fpaths, columns),
+                    columns,
+                    decimals=SEASON_DECIMALS,
+                ),
+                ttl,
+            )
+
+        def _seasonal(entity: str, where: dict, columns_of) -> pd.DataFrame:
+            blocks = [
+                _stream(
+                    entity,
+                    {**where, "season_gte": start, "season_lt": start + SEASON_BLOCK},
+                    columns_of,
+                    season_ttl(start + SEASON_BLOCK, head),
+                )
+                for start in range(0, head + 1, SEASON_BLOCK)
+            ]
+            filled = [block for block in blocks if not block.empty]
+            return pd.concat(filled, ignore_index=True) if filled else blocks[0]
+
+        # only the missing seasons are re-queried when a snapshot has gaps
+        def _backfill(entity: str, where: dict, columns_of):
+            def _fetch(gaps: list[int]) -> pd.DataFrame:
+                return _stream(
+                    entity,
+                    {**where, "season_in": gaps},
+                    columns_of,
+                    season_ttl(max(gaps) + 1, head),
+                )
+
+            return _fetch
+
+        seasonal_df = _seasonal("seasons", {"createdAt_gt": 0}, seasons_columns)
+        fields_df = _seasonal(
+            "fieldHourlySnapshots", {"field": source.protocol}, fields_columns
+        )
+        silos_df = _seasonal(
+            "siloHourlySnapshots", {"silo": source.protocol}, silos_columns
         )
-        silos = pintostalk.Query.siloHourlySnapshots(where={"silo": PROTOCOL}, **args)
 
-        plots = pintostalk.Query.plots(
-            orderBy="createdAt",
-            orderDirection="desc",
-            where={"source": "SOW"},
-            first=ALL,
+        # plots dominate refresh time, so they are paged by cursor with an adaptive
+        # page size rather than through subgrounds' default pagination
+        def _plots(where: dict) -> pd.DataFrame:
+            def _fetch(cursor: Cursor | None, first: int) -> pd.DataFrame:
+                plots = pintostalk.Query.plots(
+                    orderBy="createdAt",
+                    orderDirection="desc",
+                    where=cursor_where(where, cursor),
+                    first=first,
+                )
+                fpaths, columns = zip(*plots_columns(plots))
+                return sg.query_df(
+                    list(fpaths), columns=list(columns), pagination_strategy=None
+                )
+
+            columns = [column for _, column in plots_columns(pintostalk.Query.plots)]
+            return cache.fetch(
+                source.pintostalk,
+                "plots",
+                {"where": where, "orderBy": "createdAt", "orderDirection": "desc"},
+                columns,
+                lambda: collect(
+                    iter_cursor_pages(_fetch),
+                    columns,
+                    decimals=PLOT_DECIMALS,
+                    timestamps=PLOT_TIMESTAMPS,
+                ),
+                ENTITY_TTLS["plots"],
+            )
+
+        # after the first download only plots updated since the last sync are fetched,
+        # `gte` re-fetches plots sharing the watermark second since upserts are idempotent
+        # the store's frame isn't copied, cached snapshots are kept serialized
+        plots_df = plot_store(source).sync(
+            lambda: _plots({"source": "SOW"}),
+            lambda watermark: _plots({"source": "SOW", "updatedAt_gte": watermark}),
         )
 
-        fpath_to_column = [
-            (seasons.createdAt, "timestamp"),
-            (seasons.season, "season"),
-            (seasons.raining, "raining"),
-            (seasons.price, "price"),
-            (seasons.floodSiloBeans, "flood_silo_pinto"),
-            (seasons.floodFieldBeans, "flood_field_pinto"),
-            (seasons.deltaB, "twa_delta_pinto"),
-            (seasons.deltaBeans, "delta_pinto"),
-            (seasons.incentiveBeans, "gm_reward"),
-            (seasons.rewardBeans, "twa_minted_pinto"),
-            (seasons.marketCap, "market_cap"),
-            (silos.beanMints, "cum_pinto_minted"),
-            (silos.activeFarmers, "active_silo_farmers"),
-            # (silos.avgGrownStalkPerBdvPerSeason, "avg_grown_stalk_per_bdv"),
-            # (silos.beanToMaxLpGpPerBdvRatio, ),
-            # (silos.createdAt, ),
-            (silos.deltaActiveFarmers, "delta_active_silo_farmers"),
-            # (silos.deltaAvgGrownStalkPerBdvPerSeason, ),
-            (silos.deltaBeanMints, "delta_pinto_minted"),
-            (silos.deltaGrownStalkPerSeason, "delta_grown_stalk_per_season"),
-            (silos.deltaGerminatingStalk, "delta_germinating_stalk"),
-            (silos.deltaDepositedBDV, "delta_deposited_pdv"),
-            (silos.deltaPlantableStalk, "delta_unclaimed_stalk"),
-            (silos.deltaRoots, "delta_roots"),
-            (silos.deltaStalk, "delta_stalk"),
-            (silos.depositedBDV, "deposited_pdv"),
-            (silos.germinatingStalk, "germinating_stalk"),
-            (silos.grownStalkPerSeason, "grown_stalk_per_season"),
-            # (silos.id, ),
-            (silos.plantableStalk, "unclaimed_stalk"),
-            (silos.season, "silo_season"),
-            (silos.roots, "roots"),  # uncompounded stalk
-            (silos.stalk, "stalk"),
-            # (silos.updatedAt, ),
-            # (fields.id, ""),
-            (fields.season, "field_season"),
-            (fields.podRate, "pod_rate"),
-            (fields.temperature, "temperature"),
-            (fields.podIndex, "pod_index"),
-            (fields.harvestableIndex, "harvestable_index"),
-            (fields.sownBeans, "sown_pinto"),
-            (fields.harvestedPods, "harvested_pods"),
-            # (fields.createdAt, ""),
-            # (fields.caseId, ""),
-            (fields.blocksToSoldOutSoil, "blocks_to_soil_sold_out"),
-            (fields.deltaHarvestableIndex, "delta_harvestable_index"),
-            (fields.deltaHarvestablePods, "delta_harvestable_pods"),
-            (fields.deltaHarvestedPods, "delta_harvested_pods"),
-            (fields.deltaIssuedSoil, "delta_issued_soil"),
-            (fields.deltaNumberOfSowers, "delta_number_of_sowers"),
-            (fields.deltaNumberOfSows, "delta_number_of_sows"),
-            (fields.deltaPodIndex, "delta_pod_index"),
-            (fields.deltaPodRate, "delta_pod_rate"),
-            (fields.deltaRealRateOfReturn, "delta_real_rate_of_return"),
-            (fields.deltaSownBeans, "delta_sown_pinto"),
-            (fields.deltaTemperature, "delta_temperature"),
-            (fields.deltaUnharvestablePods, "delta_unharvestable_pods"),
-            (fields.deltaSoil, "delta_soil"),
-            (fields.numberOfSows, "cum_number_of_sows"),
-            (fields.issuedSoil, "cum_issued_soil"),
-            (fields.numberOfSowers, "cum_number_of_sowers"),
-            (fields.harvestablePods, "harvestable_pods"),
-            (fields.soilSoldOut, "soil_sold_out"),
-            (fields.soil, "soil"),
-            (fields.realRateOfReturn, "real_rate_of_return"),
-            (fields.unharvestablePods, "unharvestable_pods"),
-            # (fields.updatedAt, ""),
-            (plots.id, "id"),
-            (plots.updatedAt, "updated_at"),
-            (plots.createdAt, "created_at"),
-            (plots.harvestAt, "harvest_at"),
-            (plots.source, "source"),
-            (plots.season, "season"),
-            (plots.pods, "pods"),
-            (plots.index, "index"),
-            (plots.harvestablePods, "harvestable_pods"),
-            (plots.harvestedPods, "harvested_pods"),
-            (plots.fullyHarvested, "fully_harvested"),
-            (plots.beansPerPod, "pinto_spent_per_pod"),
-            (plots.farmer.id, "farmer"),
-        ]
-        fpaths, columns = zip(*fpath_to_column)
-
-        [seasonal_df, silos_df, fields_df, plots_df] = sg.query_df(
-            fpaths, columns=columns
+        # hourly snapshots are reduced to exactly one row per season before merging
+        fields_df, field_gaps = reconcile_snapshots(
+            fields_df,
+            seasonal_df["season"],
+            "field_season",
+            "field_updated_at",
+            _backfill(
+                "fieldHourlySnapshots", {"field": source.protocol}, fields_columns
+            ),
+        )
+        silos_df, silo_gaps = reconcile_snapshots(
+            silos_df,
+            seasonal_df["season"],
+            "silo_season",
+            "silo_updated_at",
+            _backfill("siloHourlySnapshots", {"silo": source.protocol}, silos_columns),
         )
 
         # Merge seasonal_df and fields_df on 'season' and 'field_season'
@@ -225,73 +417,25 @@ def gather_data() -> Data:
 
         merged_df.drop(columns=["field_season", "silo_season"], inplace=True)
 
+        # flood state is derived once here instead of on every page
+        merged_df = flood_state(merged_df)
+
         # Convert merged_df to more memory-efficient format
-        merged_df = merged_df.apply(
-            lambda col: pd.to_numeric(col, errors="coerce")
-            if col.dtype == "object"
-            else col
-        )
         merged_df = merged_df.convert_dtypes(dtype_backend="pyarrow")
 
-        # apply decimals to specific columns
-        for column in [
-            "flood_silo_pinto",
-            "flood_field_pinto",
-            "twa_delta_pinto",
-            "delta_pinto",
-            "gm_reward",
-            "twa_minted_pinto",
-            "pod_index",
-            "harvestable_index",
-            "sown_pinto",
-            "harvested_pods",
-            "delta_harvestable_index",
-            "delta_harvestable_pods",
-            "delta_harvested_pods",
-            "delta_issued_soil",
-            "delta_pod_index",
-            "delta_sown_pinto",
-            "delta_unharvestable_pods",
-            "delta_soil",
-            "cum_issued_soil",
-            "harvestable_pods",
-            "soil",
-            "unharvestable_pods",
-            "cum_pinto_minted",
-            "delta_pinto_minted",
-            "delta_grown_stalk_per_season",
-            "delta_germinating_stalk",
-            "delta_deposited_pdv",
-            "delta_unclaimed_stalk",
-            "delta_stalk",
-            "deposited_pdv",
-            "germinating_stalk",
-            "grown_stalk_per_season",
-            "unclaimed_stalk",
-            "stalk",
-            "roots",
-            "delta_roots",
-        ]:
-            merged_df[column] /= 10**6
-
         # createdAt -> timestamp
         merged_df["datetime"] = pd.to_datetime(merged_df["timestamp"], unit="s")
 
-        # plots stuff
-        plots_df = plots_df.convert_dtypes(dtype_backend="pyarrow")
-        plots_df["updated_at"] = pd.to_datetime(plots_df["updated_at"], unit="s")
-        plots_df["created_at"] = pd.to_datetime(plots_df["created_at"], unit="s")
-        plots_df["harvest_at"] = pd.to_datetime(plots_df["harvest_at"], unit="s")
-
-        # apply decimals to specific columns
-        for column in [
-            "pods",
-            "pinto_spent_per_pod",
-            "index",
-            "harvestable_pods",
-            "harvested_pods",
-        ]:
-            plots_df[column] /= 10**6
-
         # st.write(merged_df.dtypes)
-        return Data(merged_df, plots_df)
+        data = Data(
+            merged_df,
+            plots_df,
+            {"fieldHourlySnapshots": field_gaps, "siloHourlySnapshots": silo_gaps},
+            "{}-{}-{}".format(
+                source.name, int(merged_df["season"].iloc[-1]), watermark(plots_df)
+            ),
+            source,
+        )
+        # every refresh is kept as a version that can be looked at later, see `history`
+        snapshot_history(source).record(data.version, data.df, data.plots)
+        return data
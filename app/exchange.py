@@ -0,0 +1,221 @@
+"""
+Ingestion of the exchange subgraph: wells (pools), their trades and hourly liquidity
+ snapshots. It runs separately from `gather_data`, every sync only fetches what was
+ indexed after the previous one, and trades are stored append-only in block order.
+"""
+
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from data import ALL
+from httpx import HTTPError
+from ingest import STRING_COLUMNS, collect, stream_pages
+from pagination import Cursor, cursor_where, iter_cursor_pages
+from sources import Source, current_source, resident_stores
+from subgrounds import FieldPath, Subgrounds
+from subgrounds.errors import SubgroundsError
+
+SYNC_INTERVAL = 60  # seconds
+HOUR_SECONDS = 60 * 60
+# well addresses, names and symbols are kept as decoded strings
+STRINGS = STRING_COLUMNS | {"well", "name", "symbol"}
+
+
+def wells_columns(wells: FieldPath) -> list[tuple[FieldPath, str]]:
+    return [
+        (wells.id, "id"),
+        (wells.name, "name"),
+        (wells.symbol, "symbol"),
+        (wells.totalLiquidityUSD, "liquidity_usd"),
+        (wells.cumulativeTradeVolumeUSD, "cum_volume_usd"),
+    ]
+
+
+def trades_columns(trades: FieldPath) -> list[tuple[FieldPath, str]]:
+    return [
+        (trades.id, "id"),
+        (trades.well.id, "well"),
+        (trades.blockNumber, "block"),
+        (trades.timestamp, "timestamp"),
+        (trades.tradeVolumeUSD, "volume_usd"),
+    ]
+
+
+def liquidity_columns(snapshots: FieldPath) -> list[tuple[FieldPath, str]]:
+    return [
+        (snapshots.id, "id"),
+        (snapshots.well.id, "well"),
+        (snapshots.createdTimestamp, "timestamp"),
+        (snapshots.totalLiquidityUSD, "liquidity_usd"),
+        (snapshots.deltaTradeVolumeUSD, "delta_volume_usd"),
+    ]
+
+
+def _append(table: pa.Table | None, frame: pd.DataFrame) -> pa.Table:
+    # appending chunks doesn't copy the existing ones
+    new = pa.Table.from_pandas(frame, preserve_index=False)
+    if table is None:
+        return new
+    return pa.concat_tables([table, new], promote_options="permissive")
+
+
+class ExchangeStore:
+    """Columnar exchange data, kept in sync incrementally.
+
+    Trades are sorted by block (and timestamp), so any time range is located through a
+     binary search on `_timestamps` instead of a scan.
+    """
+
+    def __init__(self, source: Source):
+        self.source = source
+        self.wells = pd.DataFrame()
+        self.trades: pa.Table | None = None
+        self.liquidity: pa.Table | None = None
+        self._timestamps = np.empty(0, dtype=np.int64)
+        self.last_block = 0
+        self.synced_at = 0.0
+        self._lock = threading.Lock()
+
+    def sync(self, force: bool = False):
+        with self._lock:
+            if not force and time.time() - self.synced_at < SYNC_INTERVAL:
+                return
+            # a failed sync is retried after the interval as well
+            self.synced_at = time.time()
+
+            # every table is only replaced once its own fetch completed
+            with Subgrounds() as sg:
+                exchange = sg.load_subgraph(self.source.exchange)
+                fpaths, columns = zip(*wells_columns(exchange.Query.wells(first=ALL)))
+                self.wells = collect(
+                    stream_pages(sg, fpaths, columns), columns, strings=STRINGS
+                )
+                self._sync_trades(sg, exchange)
+                self._sync_liquidity(sg, exchange)
+
+    def _sync_trades(self, sg: Subgrounds, exchange):
+        where = {"tradeType": "SWAP", "blockNumber_gt": self.last_block}
+
+        def _fetch(cursor: Cursor | None, first: int) -> pd.DataFrame:
+            trades = exchange.Query.trades(
+                orderBy="blockNumber",
+                orderDirection="asc",
+                where=cursor_where(where, cursor, "blockNumber", "asc"),
+                first=first,
+            )
+            fpaths, columns = zip(*trades_columns(trades))
+            return sg.query_df(
+                list(fpaths), columns=list(columns), pagination_strategy=None
+            )
+
+        columns = [column for _, column in trades_columns(exchange.Query.trades)]
+        new = collect(
+            iter_cursor_pages(_fetch, cursor_columns=("block", "id")),
+            columns,
+            strings=STRINGS,
+        )
+        if new.empty:
+            return
+
+        # graph-node indexes whole blocks at once, so blocks never need revisiting
+        self.trades = _append(self.trades, new)
+        self._timestamps = np.concatenate(
+            [self._timestamps, new["timestamp"].to_numpy(dtype=np.int64)]
+        )
+        self.last_block = int(new["block"].max())
+
+    def _sync_liquidity(self, sg: Subgrounds, exchange):
+        # the snapshot of the current hour keeps changing, so it's always replaced
+        since, liquidity = 0, self.liquidity
+        if liquidity is not None and liquidity.num_rows:
+            since = int(pc.max(liquidity["timestamp"]).as_py())
+            liquidity = liquidity.filter(pc.less(liquidity["timestamp"], since))
+
+        snapshots = exchange.Query.wellHourlySnapshots(
+            first=ALL,
+            orderBy="createdTimestamp",
+            orderDirection="asc",
+            where={"createdTimestamp_gte": since},
+        )
+        fpaths, columns = zip(*liquidity_columns(snapshots))
+        new = collect(stream_pages(sg, fpaths, columns), columns, strings=STRINGS)
+        if not new.empty:
+            self.liquidity = _append(liquidity, new)
+
+    def trades_between(self, start: int, end: int) -> pd.DataFrame:
+        """Trades with `start <= timestamp < end`, in seconds."""
+
+        if self.trades is None:
+            return pd.DataFrame()
+        lo, hi = np.searchsorted(self._timestamps, [start, end])
+        trades = self.trades.slice(int(lo), int(hi - lo))
+        return trades.to_pandas(types_mapper=pd.ArrowDtype)
+
+    def volume(self, start: int, end: int) -> float:
+        """Total USD volume traded with `start <= timestamp < end`, in seconds."""
+
+        if self.trades is None:
+            return 0.0
+        lo, hi = np.searchsorted(self._timestamps, [start, end])
+        volume = pc.sum(self.trades["volume_usd"].slice(int(lo), int(hi - lo)))
+        return float(volume.as_py() or 0.0)
+
+    def memory_usage(self) -> int:
+        tables = [table for table in (self.trades, self.liquidity) if table is not None]
+        return (
+            sum(table.nbytes for table in tables)
+            + self._timestamps.nbytes
+            + int(self.wells.memory_usage(deep=True).sum())
+        )
+
+    @property
+    def total_liquidity(self) -> float:
+        if self.wells.empty:
+            return 0.0
+        return float(self.wells["liquidity_usd"].sum())
+
+    def hourly(self) -> pd.DataFrame:
+        """Liquidity and volume across all wells per hour."""
+
+        if self.liquidity is None:
+            return pd.DataFrame(columns=["datetime", "liquidity_usd", "volume_usd"])
+
+        df = self.liquidity.to_pandas()
+        df["hour"] = df["timestamp"] // HOUR_SECONDS * HOUR_SECONDS
+
+        # wells only snapshot hours they were active in, so their last known liquidity
+        # is carried forward before summing across wells
+        liquidity = (
+            df.pivot_table(
+                index="hour", columns="well", values="liquidity_usd", aggfunc="last"
+            )
+            .ffill()
+            .sum(axis=1)
+        )
+        volume = df.groupby("hour")["delta_volume_usd"].sum()
+
+        hourly = pd.DataFrame({"liquidity_usd": liquidity, "volume_usd": volume})
+        hourly["datetime"] = pd.to_datetime(hourly.index, unit="s")
+        return hourly.reset_index(drop=True)
+
+
+def exchange_store(source: Source) -> ExchangeStore:
+    return resident_stores().get(source.name, "exchange", lambda: ExchangeStore(source))
+
+
+def exchange_data(source: Source | None = None) -> ExchangeStore:
+    """The shared exchange store of a source (the current one by default), synced at
+    most once per `SYNC_INTERVAL`.
+    """
+
+    store = exchange_store(source or current_source())
+    try:
+        store.sync()
+    # while the subgraph can't be reached the last synced tables are served
+    except (OSError, HTTPError, SubgroundsError):
+        pass
+    return store
@@ -0,0 +1,139 @@
+"""
+Per-farmer sowing and harvesting totals, maintained from the plot changes of every sync
+ rather than grouped out of the plots frame. Totals are kept for all time and per hour, so
+ any window is summed from the (hour, farmer) rows it covers, and leaderboards are a
+ partial sort of the farmers.
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+from data import plot_store
+from sketches import HOUR_SECONDS
+from sources import Source, resident_stores
+from sync import PlotChanges, seconds
+
+TOTALS = ["sows", "sown_pods", "spent_pinto", "harvested_pods"]
+
+
+def plot_events(changes: PlotChanges) -> pd.DataFrame:
+    """The sows and harvests of a sync, as `time`, `farmer` and `TOTALS` rows.
+
+    Sows are timed by when the plot was created, harvests by the update that harvested
+     them and only count the pods harvested since the previous version of the plot.
+    """
+
+    sown = changes.inserted
+    pods = sown["pods"].to_numpy(dtype=float)
+    sows = pd.DataFrame(
+        {
+            "time": seconds(sown["created_at"]),
+            "farmer": sown["farmer"].to_numpy(),
+            "sows": 1,
+            "sown_pods": pods,
+            "spent_pinto": pods * sown["pinto_spent_per_pod"].to_numpy(dtype=float),
+            "harvested_pods": 0.0,
+        }
+    )
+
+    harvested = pd.concat([sown, changes.after], ignore_index=True)
+    previously = np.concatenate(
+        [
+            np.zeros(len(sown)),
+            changes.before["harvested_pods"].to_numpy(dtype=float, na_value=0),
+        ]
+    )
+    delta = harvested["harvested_pods"].to_numpy(dtype=float, na_value=0) - previously
+    harvests = pd.DataFrame(
+        {
+            "time": seconds(harvested["updated_at"]),
+            "farmer": harvested["farmer"].to_numpy(),
+            "sows": 0,
+            "sown_pods": 0.0,
+            "spent_pinto": 0.0,
+            "harvested_pods": delta,
+        }
+    )[delta > 0]
+
+    return pd.concat([sows, harvests], ignore_index=True)
+
+
+class FarmerTotals:
+    """The `TOTALS` of every farmer, for all time and per hour."""
+
+    def __init__(self):
+        # `hour`, `farmer` and `TOTALS` rows sorted by hour, an hour may repeat
+        self.hourly = pd.DataFrame(
+            {"hour": pd.Series(dtype=np.int64), "farmer": pd.Series(dtype=object)}
+            | {column: pd.Series(dtype=float) for column in TOTALS}
+        )
+        self.total = pd.DataFrame(columns=TOTALS, dtype=float)
+        self._lock = threading.Lock()
+
+    def add(self, events: pd.DataFrame):
+        if events.empty:
+            return
+
+        hour = events["time"] // HOUR_SECONDS * HOUR_SECONDS
+        hourly = (
+            events.assign(hour=hour)
+            .groupby(["hour", "farmer"], as_index=False)[TOTALS]
+            .sum()
+        )
+        with self._lock:
+            # syncs mostly bring recent events, older ones are merged back in order
+            last = None if self.hourly.empty else self.hourly["hour"].iloc[-1]
+            appends = last is None or hourly["hour"].iloc[0] >= last
+            self.hourly = pd.concat([self.hourly, hourly], ignore_index=True)
+            if not appends:
+                self.hourly = self.hourly.sort_values(
+                    "hour", kind="stable", ignore_index=True
+                )
+            self.total = self.total.add(
+                hourly.groupby("farmer")[TOTALS].sum(), fill_value=0
+            )
+
+    def window(self, start: int | None = None, end: int | None = None) -> pd.DataFrame:
+        """The totals of every farmer active within the hours overlapping
+        `[start, end)`, in seconds.
+        """
+
+        with self._lock:
+            if start is None and end is None:
+                return self.total
+            hours = self.hourly["hour"].to_numpy()
+            if start is not None:
+                start = start // HOUR_SECONDS * HOUR_SECONDS
+            lo = 0 if start is None else hours.searchsorted(start)
+            hi = len(hours) if end is None else hours.searchsorted(end)
+            rows = self.hourly.iloc[lo:hi]
+        return rows.groupby("farmer")[TOTALS].sum()
+
+    def memory_usage(self) -> int:
+        return int(
+            self.hourly.memory_usage(deep=True).sum()
+            + self.total.memory_usage(deep=True).sum()
+        )
+
+
+def farmer_totals(source: Source) -> FarmerTotals:
+    def _create() -> FarmerTotals:
+        totals = FarmerTotals()
+        plot_store(source).subscribe(lambda changes: totals.add(plot_events(changes)))
+        return totals
+
+    return resident_stores().get(source.name, "farmers", _create)
+
+
+def temperature(totals: pd.DataFrame) -> pd.Series:
+    """The average temperature (%) each farmer sowed at, weighted by pinto spent."""
+
+    return (totals["sown_pods"] / totals["spent_pinto"] - 1) * 100
+
+
+def leaderboard(totals: pd.DataFrame, column: str, k: int) -> pd.DataFrame:
+    """The `k` farmers with the largest positive `column`, partially sorted."""
+
+    values = totals[column]
+    return totals.loc[values[values > 0].nlargest(k).index]
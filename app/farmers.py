@@ -0,0 +1,74 @@
+"""
+Leaderboards of the farmers sowing and harvesting in the field, over any time window.
+"""
+
+import time
+
+import pandas as pd
+import streamlit as st
+from data import gather_data
+from farmer_store import farmer_totals, leaderboard, temperature
+from millify import millify
+from sources import current_source
+from tables import number
+from utils import M, metrics
+
+DAY_SECONDS = 60 * 60 * 24
+WINDOWS = {"All": None, "30d": 30, "7d": 7, "24hr": 1}  # days
+
+COLUMNS = {
+    "farmer": st.column_config.TextColumn("Farmer"),
+    "sows": number("Sows", step=1),
+    "sown_pods": number("Pods Sown"),
+    "spent_pinto": number("Pinto Spent"),
+    "harvested_pods": number("Pods Harvested"),
+    "temperature": number("Avg Temperature (%)"),
+}
+
+
+def board(title: str, totals: pd.DataFrame, column: str, k: int, *others: str):
+    """The top `k` farmers by `column`, showing `others` next to it."""
+
+    st.markdown(f"**{title}**")
+    st.dataframe(
+        leaderboard(totals, column, k).reset_index(names="farmer"),
+        column_config=COLUMNS,
+        column_order=["farmer", column, *others],
+        hide_index=True,
+        use_container_width=True,
+    )
+
+
+def main():
+    data = gather_data(current_source())
+    store = farmer_totals(data.source)
+
+    st.header("🧑‍🌾 Farmer Leaderboard")
+    k = st.slider("Farmers", min_value=5, max_value=50, value=10, step=5)
+
+    now = int(time.time())
+    for tab, days in zip(st.tabs(list(WINDOWS)), WINDOWS.values()):
+        with tab:
+            totals = store.window(None if days is None else now - days * DAY_SECONDS)
+            if totals.empty:
+                st.write("No sows or harvests in this time period")
+                continue
+
+            totals = totals.assign(temperature=temperature(totals))
+            metrics(
+                M("Active Farmers", f"{len(totals):,}"),
+                M("Sows", millify(totals["sows"].sum())),
+                M("Pods Sown", millify(totals["sown_pods"].sum(), 2)),
+                M("Pods Harvested", millify(totals["harvested_pods"].sum(), 2)),
+            )
+
+            sowers, harvesters, temperatures = st.columns(3)
+            with sowers:
+                board("🌱 Top Sowers", totals, "sown_pods", k, "sows", "spent_pinto")
+            with harvesters:
+                board("🧺 Top Harvesters", totals, "harvested_pods", k, "sown_pods")
+            with temperatures:
+                board("🌡️ Highest Temperatures", totals, "temperature", k, "sown_pods")
+
+
+main()
@@ -5,8 +5,12 @@ This page calculates analytics related to the field, the credit facility for Pin
 import altair as alt
 import pandas as pd
 import streamlit as st
+from charts import altair_chart
 from data import Data, gather_data
+from forecast import harvest_forecaster
 from millify import millify
+from sketches import harvest_time_sketches
+from sources import current_source
 from utils import M, metrics
 
 SECONDS_TO_DAYS = 60 * 60 * 24
@@ -14,15 +18,19 @@ SECONDS_TO_DAYS = 60 * 60 * 24
 
 def time_to_harvest(data: Data):
     st.title("🌾 Time to Harvest")
-    df, plots = data
+    plots = data.plots
 
-    def _calc(filtered: pd.DataFrame):
-        harvested = filtered[~filtered["harvest_at"].isnull()].copy()
+    sketches = harvest_time_sketches(data.source)
+
+    def _calc(filtered: pd.DataFrame, since: pd.Timestamp | None = None):
+        harvested = filtered[~filtered["harvest_at"].isnull()]
         if harvested.empty:
             st.write("No pods have been harvested in this time period")
             return
 
-        harvested["diff"] = harvested["harvest_at"] - harvested["created_at"]
+        # durations come from the merged hourly sketches of the window, not a sort
+        durations = sketches.window(None if since is None else int(since.timestamp()))
+        median, p90 = durations.quantiles([0.5, 0.9])
         metrics(
             M(
                 "Total Pods",
@@ -36,18 +44,9 @@ def time_to_harvest(data: Data):
                     2,
                 ),
             ),
-            M(
-                "Average (days)",
-                millify(
-                    harvested["diff"].dt.total_seconds().mean() / SECONDS_TO_DAYS, 1
-                ),
-            ),
-            M(
-                "Median (days)",
-                millify(
-                    harvested["diff"].dt.total_seconds().median() / SECONDS_TO_DAYS, 1
-                ),
-            ),
+            M("Average (days)", millify(durations.mean / SECONDS_TO_DAYS, 1)),
+            M("Median (days)", millify(median / SECONDS_TO_DAYS, 1)),
+            M("90th Percentile (days)", millify(p90 / SECONDS_TO_DAYS, 1)),
         )
 
         # harvested["diff_days"] = harvested["diff"].dt.total_seconds() / SECONDS_TO_DAYS
@@ -104,18 +103,51 @@ def time_to_harvest(data: Data):
     with all:
         _calc(plots)
 
-    with day:
-        _calc(plots[plots["created_at"] > pd.Timestamp.now() - pd.Timedelta(days=1)])
+    for tab, days in ((day, 1), (week, 7), (month, 30)):
+        since = pd.Timestamp.now() - pd.Timedelta(days=days)
+        with tab:
+            _calc(plots[plots["created_at"] > since], since)
 
-    with week:
-        _calc(plots[plots["created_at"] > pd.Timestamp.now() - pd.Timedelta(days=7)])
 
-    with month:
-        _calc(plots[plots["created_at"] > pd.Timestamp.now() - pd.Timedelta(days=30)])
+@st.fragment
+def harvest_forecast(data: Data):
+    st.subheader("🔮 Harvest Forecast")
+    forecaster = harvest_forecaster(data.source.name)
+    state = forecaster.update(data.df)
+
+    index = st.number_input(
+        "Pod Index",
+        min_value=0.0,
+        value=float(data.latest_season["pod_index"]),
+        help="Defaults to the end of the pod line",
+    )
+    seasons = forecaster.seasons_until(index)
+    harvestable_at = forecaster.harvestable_at(index)
+    metrics(
+        M(
+            "Place in Line",
+            millify(max(index - state.harvestable_index, 0), 2),
+        ),
+        M(
+            "Pods Harvestable per Season",
+            millify(state.velocity, 2),
+            help="Exponentially weighted, including flood field returns",
+        ),
+        M(
+            "Seasons until Harvestable",
+            millify(seasons, 1) if seasons != float("inf") else "N/A",
+        ),
+        M(
+            "Estimated Harvest",
+            harvestable_at.strftime("%Y-%m-%d")
+            if not pd.isna(harvestable_at)
+            else "N/A",
+        ),
+    )
 
 
-def max_temperature_graph(df: pd.DataFrame):
-    df["temperature"] /= 100
+def max_temperature_chart(df: pd.DataFrame) -> alt.LayerChart:
+    df = df.assign(temperature=df["temperature"] / 100)
     nearest = alt.selection_point(
         nearest=True,
         on="pointerover",
@@ -175,11 +207,20 @@ def max_temperature_graph(df: pd.DataFrame):
         title="Max temperature over time"
     )
 
-    st.altair_chart(chart.interactive(bind_y=False), use_container_width=True)
+    return chart.interactive(bind_y=False)
+
+
+def max_temperature_graph(df: pd.DataFrame, version: str):
+    altair_chart(
+        version,
+        "max_temperature",
+        lambda: max_temperature_chart(df),
+        use_container_width=True,
+    )
 
 
 def main():
-    data = gather_data()
+    data = gather_data(current_source())
     st.header("🌾 Field Analytics")
     st.subheader("Season {}".format(data.latest_season["season"]))
 
@@ -226,8 +267,9 @@ def main():
         ),
     )
 
-    max_temperature_graph(data.df)
+    max_temperature_graph(data.df, data.version)
     time_to_harvest(data)
+    harvest_forecast(data)
 
 
 main()
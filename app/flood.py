@@ -4,77 +4,294 @@ This page analyzes the seasonal data, chunking it by floods to determine the per
 """
 
 import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
 import streamlit as st
+from charts import plotly_chart
 from data import gather_data
+from flood_store import FloodSeasons, build_flood_seasons, calculate_flood_details
 from millify import millify
+from plotly.subplots import make_subplots
+from simulate import FloodParameters, parameter_grid, simulate_floods, summarize
+from sketches import QuantileSketch, flood_length_sketch
+from sources import RESIDENT_SNAPSHOTS, current_source
+from tables import number, paged_table
+from timeseries import price_data
 from utils import M, metrics
 
+# breakdown of the pinto distributed during a season
+BREAKDOWN = {
+    "flood_silo_pinto": "Sold to Silo",
+    "flood_field_pinto": "Sold to Field",
+    "twa_minted_pinto": "TWA Minted Pinto",
+    "gm_reward": "gm() Reward",
+}
+PIE_BUDGET = 12
 
-def calculate_flood_details(df: pd.DataFrame) -> pd.DataFrame:
-    """This function chunks and aggregates the seasons data into floods."""
-
-    # helpful total flood calculation
-    df["total_flood_pinto"] = df["flood_silo_pinto"] + df["flood_field_pinto"]
-
-    # We shift raining over to detect differences between raining regions
-    df["raining"] = df["raining"].astype(int)
-    df["flood_no"] = (df["raining"] != df["raining"].shift()).cumsum()
-    df["flood_length"] = 0
-
-    raining_chunks = df[df["raining"] == 1].groupby("flood_no")
-
-    # we aggregate based on specific functions for each field
-    aggregated_chunks = raining_chunks.agg(
-        {
-            "season": "first",
-            "flood_length": "size",
-            "price": "mean",
-            "flood_silo_pinto": "sum",
-            "flood_field_pinto": "sum",
-            "total_flood_pinto": "sum",
-            "delta_pinto": "sum",
-            "gm_reward": "sum",
-            "twa_minted_pinto": "sum",
-        }
-    )
 
-    # drop aggregated chunks with less than 2 seasons
-    aggregated_chunks = aggregated_chunks[aggregated_chunks["flood_length"] > 1]
+# floods only change with the snapshot, so they are derived once per version and shared
+# read-only between sessions and fragment reruns
+@st.cache_resource(max_entries=RESIDENT_SNAPSHOTS)
+def flood_tables(version: str, _df: pd.DataFrame) -> tuple[pd.DataFrame, FloodSeasons]:
+    df = _df.copy(deep=False)
+    flood_data = calculate_flood_details(df)
+    return flood_data, build_flood_seasons(df)
+
+
+def is_raining(df: pd.DataFrame) -> bool:
+    return bool(df["raining"].iat[-1])
+
+
+def flood_overview_figure(df: pd.DataFrame, flood_data: pd.DataFrame) -> go.Figure:
+    """Stacked bars of the pinto sold to the silo and field during every flood."""
+
+    fig = go.Figure()
+    fig.add_trace(
+        go.Bar(
+            x=flood_data.index,
+            y=flood_data["flood_silo_pinto"],
+            name="Silo",
+            marker_color="rgba(70, 130, 180, 0.75)",
+        )
+    )
+    fig.add_trace(
+        go.Bar(
+            x=flood_data.index,
+            y=flood_data["flood_field_pinto"],
+            name="Field",
+            marker_color="rgba(34, 139, 34, 0.75)",
+        )
+    )
+    if is_raining(df):
+        text = "Current Flood: {} Pinto Sold".format(
+            millify(flood_data["total_flood_pinto"].iloc[-1], 2)
+        )
+    else:
+        text = "Last Flood: {} Pinto Sold".format(
+            millify(flood_data["total_flood_pinto"].iloc[-1], 2)
+        )
+    fig.add_annotation(
+        x=len(flood_data["total_flood_pinto"]),
+        y=flood_data["total_flood_pinto"].iloc[-1],
+        text=text,
+        showarrow=True,
+        bgcolor="rgba(70, 130, 180, 0.25)",
+        arrowcolor="rgba(70, 130, 180, 0.75)",
+        arrowsize=0.5,
+        bordercolor="black",
+        borderwidth=2,
+        borderpad=4,
+    )
+    fig.update_layout(barmode="stack")
+    fig.update_xaxes(title_text="Flood Index")
+    fig.update_yaxes(title_text="Pinto (Millions)")
+    fig.update_layout(title="Pinto sold to Silo and Field")
+    return fig
+
+
+def flood_stats_figure(
+    current_flood: pd.Series, seasons_during_flood: pd.DataFrame
+) -> go.Figure:
+    """Line plot of all pinto stats during the seasons of a flood."""
+
+    fig = go.Figure()
+    fig.add_trace(
+        go.Scatter(
+            x=seasons_during_flood["season"],
+            y=seasons_during_flood["twa_minted_pinto"],
+            mode="lines+markers",
+            name="TWA Minted Pinto",
+            marker=dict(color="rgba(34, 139, 34, 0.75)"),
+        )
+    )
+    fig.add_trace(
+        go.Scatter(
+            x=seasons_during_flood["season"],
+            y=seasons_during_flood["twa_delta_pinto"],
+            mode="lines+markers",
+            name="TWAΔP",
+            marker=dict(color="rgba(70, 130, 180, 0.75)"),
+        )
+    )
+    fig.add_trace(
+        go.Scatter(
+            x=seasons_during_flood["season"],
+            y=seasons_during_flood["total_flood_pinto"],
+            mode="lines+markers",
+            name="Minted Flood Pinto",
+            marker=dict(color="rgba(255, 99, 71, 0.75)"),
+        )
+    )
+    fig.add_trace(
+        go.Scatter(
+            x=seasons_during_flood["season"],
+            y=seasons_during_flood["gm_reward"],
+            mode="lines",
+            name="gm() Reward",
+            marker=dict(color="rgba(255, 215, 0, 0.75)"),
+        )
+    )
+    annotation = (
+        "TWAΔP: <span style='color:#90EE90'>{}</span><br>"
+        "<span style='color:gray'>Season {}</span>"
+    )
+    latest_flood_season = seasons_during_flood.iloc[-1]
+    fig.add_annotation(
+        x=current_flood["raining_season"] + current_flood["flood_length"],
+        y=latest_flood_season["twa_delta_pinto"],
+        text=annotation.format(
+            millify(latest_flood_season["twa_delta_pinto"], 2),
+            int(current_flood["raining_season"] + current_flood["flood_length"]),
+        ),
+        showarrow=False,
+        bgcolor="rgba(0, 0, 139, 0.20)",
+        bordercolor="black",
+        borderwidth=0,
+        borderpad=4,
+        yshift=-45,
+    )
+    fig.add_annotation(
+        x=current_flood["raining_season"],
+        y=max(
+            seasons_during_flood[
+                [
+                    "twa_delta_pinto",
+                    "twa_minted_pinto",
+                    "total_flood_pinto",
+                    "gm_reward",
+                ]
+            ].max()
+        ),
+        text="Raining Season",
+        showarrow=False,
+        ax=0,
+        ay=-40,
+        bgcolor="rgba(255, 215, 0, 0.25)",
+        bordercolor="black",
+        borderwidth=1,
+        borderpad=4,
+        yshift=20,
+    )
+    fig.update_xaxes(title_text="Seasons")
+    fig.update_yaxes(title_text="Pinto")
+    fig.update_layout(title="Pinto Stats during Flood Seasons")
+    return fig
 
-    # we re-index the dataframe to start from 1
-    aggregated_chunks.reset_index(drop=True, inplace=True)
-    aggregated_chunks.index = aggregated_chunks.index + 1
 
-    # remove one from flood length to not include the raining season
-    aggregated_chunks["flood_length"] -= 1
+def flood_deltas_figure(seasons_during_flood: pd.DataFrame) -> go.Figure:
+    """Bar plot of the delta pinto introduced during the seasons of a flood."""
 
-    aggregated_chunks.rename(
-        columns={
-            "season": "raining_season",
-            "price": "average_price",
-        },
-        inplace=True,
+    fig = go.Figure()
+    fig.add_trace(
+        go.Bar(
+            x=seasons_during_flood["season"],
+            y=seasons_during_flood["delta_pinto"],
+            name="Instantaneous Delta Pinto",
+        )
     )
-    return aggregated_chunks
+    fig.update_xaxes(title_text="Seasons")
+    fig.update_yaxes(title_text="Pintos")
+    fig.update_layout(title="Pintos Minted during Flood Seasons")
+    return fig
 
 
-def is_raining(df: pd.DataFrame) -> bool:
-    return df.iloc[-1]["raining"] == 1
+def intra_season_price_figure(prices: pd.DataFrame) -> go.Figure:
+    """Price and TWA delta pinto within the seasons of a flood."""
 
+    fig = make_subplots(specs=[[{"secondary_y": True}]])
+    fig.add_trace(
+        go.Scatter(x=prices["datetime"], y=prices["price"], name="Price"),
+        secondary_y=False,
+    )
+    fig.add_trace(
+        go.Scatter(
+            x=prices["datetime"],
+            y=prices["twa_delta_pinto"],
+            name="Time Weighted Average Delta Pinto",
+        ),
+        secondary_y=True,
+    )
+    fig.update_yaxes(title_text="Price", secondary_y=False)
+    fig.update_yaxes(title_text="Pintos", secondary_y=True)
+    fig.update_layout(title="Price and deltaP within Flood Seasons")
+    return fig
+
+
+def selection_breakdown_figure(
+    flood_seasons: FloodSeasons,
+    flood_index: int,
+    points: list[int],
+    aggregate: bool,
+) -> go.Figure:
+    """Splits the pinto distributed during the selected seasons of a flood into silo,
+    field, TWA minted and gm() rewards, computed for every selected season at once.
+    """
+
+    seasons = flood_seasons.column(flood_index, "season")[points]
+    delta = flood_seasons.column(flood_index, "delta_pinto")[points]
+    values = flood_seasons.take(flood_index, list(BREAKDOWN), points)
+    labels = list(BREAKDOWN.values())
+
+    if aggregate:
+        fig = go.Figure(go.Pie(labels=labels, values=values.sum(axis=0)))
+        fig.update_layout(
+            title=f"{delta.sum():,.2f} Pinto distributed during "
+            f"Season(s) {seasons[0]}-{seasons[-1]}"
+        )
+        return fig
+
+    # a grid of pies while it stays readable, stacked percentages past the budget
+    if len(points) <= PIE_BUDGET:
+        cols = min(len(points), 4)
+        rows = -(-len(points) // cols)
+        fig = make_subplots(
+            rows=rows,
+            cols=cols,
+            specs=[[{"type": "domain"}] * cols] * rows,
+            subplot_titles=[
+                f"Season {season}: {value:,.2f}"
+                for season, value in zip(seasons, delta)
+            ],
+        )
+        for i, row in enumerate(values):
+            fig.add_trace(
+                go.Pie(labels=labels, values=row, showlegend=i == 0),
+                row=i // cols + 1,
+                col=i % cols + 1,
+            )
+        fig.update_layout(height=300 * rows)
+        return fig
 
-def general_flood_data(df: pd.DataFrame, flood_data: pd.DataFrame):
+    fig = go.Figure(
+        [
+            go.Bar(x=seasons, y=values[:, i], name=label)
+            for i, label in enumerate(labels)
+        ]
+    )
+    fig.update_layout(
+        barmode="stack",
+        barnorm="percent",
+        title="Pinto distribution per Season (%)",
+    )
+    fig.update_xaxes(title_text="Seasons")
+    return fig
+
+
+def general_flood_data(
+    df: pd.DataFrame,
+    flood_data: pd.DataFrame,
+    flood_lengths: QuantileSketch,
+    version: str,
+):
     st.subheader("⚙ General Flood Data")
 
     metrics(
         M(
             "Average Flood Length (in Seasons)",
-            millify(flood_data["flood_length"].mean(), 1),
+            millify(flood_lengths.mean, 1),
         ),
         M(
             "Median Flood Length (in Seasons)",
-            millify(flood_data["flood_length"].median(), 1),
+            millify(flood_lengths.quantile(0.5), 1),
         ),
         M(
             "Total Number of Floods",
@@ -100,88 +317,44 @@ def general_flood_data(df: pd.DataFrame, flood_data: pd.DataFrame):
     plot, data = st.tabs(["Plot", "Data"])
 
     with plot:
-        fig = go.Figure()
-        fig.add_trace(
-            go.Bar(
-                x=flood_data.index,
-                y=flood_data["flood_silo_pinto"],
-                name="Silo",
-                marker_color="rgba(70, 130, 180, 0.75)",
-            )
-        )
-        fig.add_trace(
-            go.Bar(
-                x=flood_data.index,
-                y=flood_data["flood_field_pinto"],
-                name="Field",
-                marker_color="rgba(34, 139, 34, 0.75)",
-            )
-        )
-        if is_raining(df):
-            text = "Current Flood: {} Pinto Sold".format(
-                millify(flood_data["total_flood_pinto"].iloc[-1], 2)
-            )
-        else:
-            text = "Last Flood: {} Pinto Sold".format(
-                millify(flood_data["total_flood_pinto"].iloc[-1], 2)
-            )
-        fig.add_annotation(
-            x=len(flood_data["total_flood_pinto"]),
-            y=flood_data["total_flood_pinto"].iloc[-1],
-            text=text,
-            showarrow=True,
-            bgcolor="rgba(70, 130, 180, 0.25)",
-            arrowcolor="rgba(70, 130, 180, 0.75)",
-            arrowsize=0.5,
-            bordercolor="black",
-            borderwidth=2,
-            borderpad=4,
+        plotly_chart(
+            version,
+            "flood_overview",
+            lambda: flood_overview_figure(df, flood_data),
         )
-        fig.update_layout(barmode="stack")
-        fig.update_xaxes(title_text="Flood Index")
-        fig.update_yaxes(title_text="Pinto (Millions)")
-        fig.update_layout(title="Pinto sold to Silo and Field")
-        st.plotly_chart(fig)
 
     with data:
-        to_display = flood_data.copy()
-        format = "{:,.1f}".format
-        to_display["flood_silo_pinto"] = to_display["flood_silo_pinto"].map(format)
-        to_display["flood_field_pinto"] = to_display["flood_field_pinto"].map(format)
-        to_display["total_flood_pinto"] = to_display["total_flood_pinto"].map(format)
-
-        to_display = to_display.rename(
-            columns={
-                "raining_season": "Raining Season",
-                "average_price": "Average Price",
-                "flood_silo_pinto": "Sold to Silo",
-                "flood_field_pinto": "Sold to Field",
-                "flood_length": "Number of Seasons",
-                "total_flood_pinto": "Total Pinto Sold",
-                "twa_delta_pinto": "Time Weighted Delta Pinto",
+        ongoing = is_raining(df) & (flood_data.index == len(flood_data))
+        paged_table(
+            flood_data.assign(ongoing=ongoing),
+            "floods",
+            column_config={
+                "_index": st.column_config.NumberColumn("Flood"),
+                "raining_season": st.column_config.NumberColumn("Raining Season"),
+                "flood_length": st.column_config.NumberColumn("Number of Seasons"),
+                "average_price": number("Average Price", "%.4f"),
+                "flood_silo_pinto": number("Sold to Silo"),
+                "flood_field_pinto": number("Sold to Field"),
+                "total_flood_pinto": number("Total Pinto Sold"),
+                "delta_pinto": number("Instantaneous Delta Pinto"),
+                "gm_reward": number("gm() Reward"),
+                "twa_minted_pinto": number("Time Weighted Average Minted Pinto"),
+                "ongoing": st.column_config.CheckboxColumn("Ongoing"),
             },
-        )[::-1]
-
-        if is_raining(df):
-            to_display = to_display.style.apply(
-                lambda x: [
-                    "background-color: rgba(70, 130, 180, 0.25)"
-                    if x.name == len(flood_data)
-                    else ""
-                    for _ in x
-                ],
-                axis=1,
-            )
-
-        st.dataframe(to_display)
+        )
 
 
-def current_flood(df: pd.DataFrame, flood_data: pd.DataFrame):
+@st.fragment
+def current_flood(
+    df: pd.DataFrame,
+    flood_data: pd.DataFrame,
+    flood_seasons: FloodSeasons,
+    version: str,
+):
     if is_raining(df):
         st.subheader("🌧️ Currently Flooding")
     else:
-        last_flood_season = int(df[df["raining"] == 1].iloc[-1]["season"])
-        seasons_ago = int(df.iloc[-1]["season"] - last_flood_season)
+        seasons_ago = int(df["seasons_since_rain"].iat[-1])
         st.subheader(f"🌱 Last flood was {seasons_ago} seasons ago")
 
     flood_index = st.number_input(
@@ -195,9 +368,7 @@ def current_flood(df: pd.DataFrame, flood_data: pd.DataFrame):
     flood_index -= 1
     current_flood = flood_data.iloc[flood_index]
     end_season = int(current_flood["raining_season"] + current_flood["flood_length"])
-    seasons_during_flood = df[
-        (df["season"] >= current_flood["raining_season"]) & (df["season"] <= end_season)
-    ]
+    seasons_during_flood = flood_seasons.frame(flood_index)
 
     # if chosen flood is not the earliest flood, calculate deltas
     if flood_index - 1 >= 0:
@@ -239,12 +410,12 @@ def current_flood(df: pd.DataFrame, flood_data: pd.DataFrame):
             "Flooding Seasons",
             (
                 (
-                    f"{raining_season+1}-{end_season}"
+                    f"{raining_season + 1}-{end_season}"
                     if flood_length > 1
                     else raining_season + 1
                 )
                 if not (flood_index + 1 == len(flood_data) and is_raining(df))
-                else f"{raining_season+1}-"
+                else f"{raining_season + 1}-"
             ),
         ),
     )
@@ -271,180 +442,139 @@ def current_flood(df: pd.DataFrame, flood_data: pd.DataFrame):
 
     with plot:
         # line plot for all pinto stats during flood seasons
-        fig = go.Figure()
-        fig.add_trace(
-            go.Scatter(
-                x=seasons_during_flood["season"],
-                y=seasons_during_flood["twa_minted_pinto"],
-                mode="lines+markers",
-                name="TWA Minted Pinto",
-                marker=dict(color="rgba(34, 139, 34, 0.75)"),
-            )
-        )
-        fig.add_trace(
-            go.Scatter(
-                x=seasons_during_flood["season"],
-                y=seasons_during_flood["twa_delta_pinto"],
-                mode="lines+markers",
-                name="TWAΔP",
-                marker=dict(color="rgba(70, 130, 180, 0.75)"),
-            )
+        plotly_chart(
+            version,
+            "flood_stats",
+            lambda: flood_stats_figure(current_flood, seasons_during_flood),
+            params=(flood_index,),
         )
-        fig.add_trace(
-            go.Scatter(
-                x=seasons_during_flood["season"],
-                y=seasons_during_flood["total_flood_pinto"],
-                mode="lines+markers",
-                name="Minted Flood Pinto",
-                marker=dict(color="rgba(255, 99, 71, 0.75)"),
-            )
-        )
-        fig.add_trace(
-            go.Scatter(
-                x=seasons_during_flood["season"],
-                y=seasons_during_flood["gm_reward"],
-                mode="lines",
-                name="gm() Reward",
-                marker=dict(color="rgba(255, 215, 0, 0.75)"),
-            )
-        )
-        annotation = (
-            "TWAΔP: <span style='color:#90EE90'>{}</span><br>"
-            "<span style='color:gray'>Season {}</span>"
-        )
-        latest_flood_season = seasons_during_flood.iloc[-1]
-        fig.add_annotation(
-            x=current_flood["raining_season"] + current_flood["flood_length"],
-            y=latest_flood_season["twa_delta_pinto"],
-            text=annotation.format(
-                millify(latest_flood_season["twa_delta_pinto"], 2),
-                int(current_flood["raining_season"] + current_flood["flood_length"]),
-            ),
-            showarrow=False,
-            bgcolor="rgba(0, 0, 139, 0.20)",
-            bordercolor="black",
-            borderwidth=0,
-            borderpad=4,
-            yshift=-45,
-        )
-        fig.add_annotation(
-            x=current_flood["raining_season"],
-            y=max(
-                seasons_during_flood[
-                    [
-                        "twa_delta_pinto",
-                        "twa_minted_pinto",
-                        "total_flood_pinto",
-                        "gm_reward",
-                    ]
-                ].max()
-            ),
-            text="Raining Season",
-            showarrow=False,
-            ax=0,
-            ay=-40,
-            bgcolor="rgba(255, 215, 0, 0.25)",
-            bordercolor="black",
-            borderwidth=1,
-            borderpad=4,
-            yshift=20,
-        )
-        fig.update_xaxes(title_text="Seasons")
-        fig.update_yaxes(title_text="Pinto")
-        fig.update_layout(title="Pinto Stats during Flood Seasons")
-
-        st.plotly_chart(fig)
 
         # bar plot for all delta pinto introduced during flood seasons
-        fig = go.Figure()
-        fig.add_trace(
-            go.Bar(
-                x=seasons_during_flood["season"],
-                y=seasons_during_flood["delta_pinto"],
-                name="Instantaneous Delta Pinto",
-            )
-        )
-        fig.update_xaxes(title_text="Seasons")
-        fig.update_yaxes(title_text="Pintos")
-        fig.update_layout(title="Pintos Minted during Flood Seasons")
-
-        selected = st.plotly_chart(
-            fig, on_select="rerun", selection_mode=["lasso", "points", "box"]
+        selected = plotly_chart(
+            version,
+            "flood_deltas",
+            lambda: flood_deltas_figure(seasons_during_flood),
+            params=(flood_index,),
+            on_select="rerun",
+            selection_mode=["lasso", "points", "box"],
         )
         if points := selected["selection"]["point_indices"]:
             t0 = int(points[0] + current_flood["raining_season"])
             t1 = int(points[-1] + current_flood["raining_season"])
-            summed = seasons_during_flood.iloc[points]["delta_pinto"].sum()
+            summed = flood_seasons.sum(flood_index, "delta_pinto", points)
             with st.expander(
                 f"{summed:,.2f} Pinto distributed during Selected Season(s) {t0}-{t1}"
             ):
-                for point in points:
-                    season = seasons_during_flood.iloc[point]
-                    # pie chart of pinto distribution during selected season
-                    pie_data = pd.DataFrame(
-                        {
-                            "Category": [
-                                "Sold to Silo",
-                                "Sold to Field",
-                                "TWA Minted Pinto",
-                                "gm() Reward",
-                            ],
-                            "Values": [
-                                season["flood_silo_pinto"],
-                                season["flood_field_pinto"],
-                                season["twa_minted_pinto"],
-                                season["gm_reward"],
-                            ],
-                        }
-                    )
-                    fig = px.pie(
-                        pie_data,
-                        values="Values",
-                        names="Category",
-                        title=f"{season['delta_pinto']: ,.2f} Pinto distributed during Season {int(season['season'])}",
+                mode = st.radio(
+                    "Breakdown",
+                    ["Aggregated", "Per Season"],
+                    horizontal=True,
+                    label_visibility="collapsed",
+                )
+                st.plotly_chart(
+                    selection_breakdown_figure(
+                        flood_seasons, flood_index, points, mode == "Aggregated"
                     )
-                    st.plotly_chart(fig)
+                )
+
+        # price within the seasons, the subgraph only keeps hourly snapshots
+        timestamps = flood_seasons.column(flood_index, "timestamp")
+        prices = price_data().resample(
+            int(timestamps[0]),
+            int(timestamps[-1]) + 60 * 60,
+            "1h",
+            ["price", "twa_delta_pinto"],
+        )
+        if prices.empty:
+            st.info("No hourly prices recorded for this flood yet.")
+        else:
+            st.plotly_chart(intra_season_price_figure(prices))
 
     with data:
-        to_display = seasons_during_flood[
-            [
-                "season",
-                "price",
-                "flood_silo_pinto",
-                "flood_field_pinto",
-                "total_flood_pinto",
-                "twa_delta_pinto",
-                "gm_reward",
-                "delta_pinto",
-            ]
-        ].copy()
-        format = "{:,.1f}".format
-        columns_to_format = [
-            "flood_silo_pinto",
-            "flood_field_pinto",
-            "total_flood_pinto",
-            "twa_delta_pinto",
-            "gm_reward",
-            "delta_pinto",
-        ]
-        to_display[columns_to_format] = to_display[columns_to_format].map(format)
-        to_display["pod_rate"] = seasons_during_flood["pod_rate"].map("{:.2%}".format)
+        paged_table(
+            seasons_during_flood[
+                [
+                    "season",
+                    "price",
+                    "flood_silo_pinto",
+                    "flood_field_pinto",
+                    "total_flood_pinto",
+                    "twa_delta_pinto",
+                    "gm_reward",
+                    "delta_pinto",
+                    "pod_rate",
+                ]
+            ].assign(pod_rate=seasons_during_flood["pod_rate"] * 100),
+            "flood_seasons",
+            column_config={
+                "season": st.column_config.NumberColumn("Season"),
+                "price": number("Price", "%.4f"),
+                "flood_silo_pinto": number("Sold to Silo"),
+                "flood_field_pinto": number("Sold to Field"),
+                "total_flood_pinto": number("Total Pinto Sold"),
+                "twa_delta_pinto": number("Time Weighted Average Delta Pinto"),
+                "gm_reward": number("gm() Reward"),
+                "delta_pinto": number("Instantaneous Delta Pinto"),
+                "pod_rate": number("Pod Rate", "%.2f%%"),
+            },
+            hide_index=True,
+        )
+
+
+@st.cache_data(max_entries=32)
+def simulated_summary(
+    version: str, grid: list[FloodParameters], _df: pd.DataFrame
+) -> pd.DataFrame:
+    # the largest grid (100 scenarios) replays in process in about 30ms
+    return summarize(simulate_floods(_df, grid), grid)
+
+
+@st.fragment
+def flood_simulator(df: pd.DataFrame, version: str):
+    st.subheader("🧪 What-if Floods")
+    st.markdown(
+        "Replays every season under alternative flood parameters, each combination of "
+        "the selected values is simulated as its own scenario."
+    )
+
+    left, middle, right = st.columns(3)
+    delta_thresholds = left.multiselect(
+        "TWA deltaP above", [0, 100, 1_000, 5_000, 10_000], default=[0]
+    )
+    pod_rate_thresholds = middle.multiselect(
+        "Pod Rate above",
+        [0.01, 0.03, 0.05, 0.1, 0.15],
+        default=[0.05],
+        format_func="{:.0%}".format,
+    )
+    field_caps = right.multiselect(
+        "Field returns cap (of supply)",
+        [0.0005, 0.001, 0.002, 0.005],
+        default=[0.001],
+        format_func="{:.2%}".format,
+    )
+
+    grid = parameter_grid(delta_thresholds, pod_rate_thresholds, field_caps)
+    if not grid:
+        st.write("Select at least one value for every parameter")
+        return
 
-        to_display = to_display.rename(
+    summary = simulated_summary(version, grid, df)
+    st.dataframe(
+        summary.rename(
             columns={
-                "season": "Season",
-                "price": "Price",
+                "delta_threshold": "TWA deltaP above",
+                "pod_rate_threshold": "Pod Rate above",
+                "field_cap": "Field Cap",
+                "floods": "Number of Floods",
+                "average_flood_length": "Average Flood Length",
                 "flood_silo_pinto": "Sold to Silo",
                 "flood_field_pinto": "Sold to Field",
                 "total_flood_pinto": "Total Pinto Sold",
-                "twa_delta_pinto": "Time Weighted Average Delta Pinto",
-                "gm_reward": "gm() Reward",
-                "delta_pinto": "Instantaneous Delta Pinto",
-                "twa_minted_pinto": "Time Weighted Average Minted Pinto",
-                "pod_rate": "Pod Rate",
-            },
-        )[::-1]
-        st.dataframe(to_display, hide_index=True)
+            }
+        ),
+        hide_index=True,
+    )
 
 
 def main():
@@ -460,16 +590,26 @@ def main():
         """
     )
 
-    overview, flood_analysis = st.tabs(["Overview", "Flood Analysis"])
+    overview, flood_analysis, what_if = st.tabs(
+        ["Overview", "Flood Analysis", "What-if"]
+    )
 
-    data = gather_data()
-    flood_data = calculate_flood_details(data.df)
+    data = gather_data(current_source())
+    flood_data, flood_seasons = flood_tables(data.version, data.df)
 
     with overview:
-        general_flood_data(data.df, flood_data)
+        general_flood_data(
+            data.df,
+            flood_data,
+            flood_length_sketch(data.source, flood_data, is_raining(data.df)),
+            data.version,
+        )
 
     with flood_analysis:
-        current_flood(data.df, flood_data)
+        current_flood(data.df, flood_data, flood_seasons, data.version)
+
+    with what_if:
+        flood_simulator(data.df, data.version)
 
 
 main()
@@ -0,0 +1,181 @@
+"""
+Flood state of every season, the floods aggregated from it, and ragged storage of the
+ seasons belonging to each flood. The season rows of every flood are kept as one
+ contiguous block per column, with an offsets array marking where each flood starts, so
+ selecting a flood or a subset of its seasons is a plain slice.
+"""
+
+from collections.abc import Sequence
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+FLOOD_SEASON_COLUMNS = [
+    "season",
+    "timestamp",
+    "price",
+    "pod_rate",
+    "flood_silo_pinto",
+    "flood_field_pinto",
+    "total_flood_pinto",
+    "twa_delta_pinto",
+    "twa_minted_pinto",
+    "gm_reward",
+    "delta_pinto",
+]
+
+# running sums within each raining chunk, named like the other cumulative columns
+FLOOD_CUMULATIVE_COLUMNS = {
+    "flood_silo_pinto": "cum_flood_silo_pinto",
+    "flood_field_pinto": "cum_flood_field_pinto",
+    "total_flood_pinto": "cum_total_flood_pinto",
+}
+
+
+def flood_state(df: pd.DataFrame) -> pd.DataFrame:
+    """Adds the flood state of every season to a frame sorted by season, so the current
+    state is read off the last row instead of being recomputed by every page.
+
+    - `total_flood_pinto`: pinto sold to the silo and field
+    - `flood_no`: numbers each run of raining (or dry) seasons
+    - `is_flooding`: raining for a second season or more
+    - `seasons_since_rain`: 0 while raining, missing before the first rain
+    - `cum_flood_*`: running sums within the current raining chunk, 0 when dry
+    """
+
+    raining = df["raining"].to_numpy(dtype=bool, na_value=False)
+    season = df["season"].to_numpy(dtype=float, na_value=np.nan)
+
+    changed = np.ones_like(raining)
+    changed[1:] = raining[1:] != raining[:-1]
+    flood_no = np.cumsum(changed)
+
+    is_flooding = raining & ~changed
+    last_rain = pd.Series(np.where(raining, season, np.nan)).ffill().to_numpy()
+
+    df = df.assign(
+        total_flood_pinto=df["flood_silo_pinto"] + df["flood_field_pinto"],
+        flood_no=flood_no,
+        is_flooding=is_flooding,
+        seasons_since_rain=season - last_rain,
+    )
+    values = df[list(FLOOD_CUMULATIVE_COLUMNS)].to_numpy(dtype=float, na_value=np.nan)
+    sums = (
+        pd.DataFrame(
+            np.where(raining[:, np.newaxis], values, 0),
+            index=df.index,
+            columns=list(FLOOD_CUMULATIVE_COLUMNS.values()),
+        )
+        .groupby(flood_no)
+        .cumsum()
+    )
+    return pd.concat([df, sums], axis=1)
+
+
+def calculate_flood_details(df: pd.DataFrame) -> pd.DataFrame:
+    """This function chunks and aggregates the seasons data into floods."""
+
+    # `total_flood_pinto` and the raining regions (`flood_no`) come from `flood_state`
+    df["raining"] = df["raining"].astype(int)
+    df["flood_length"] = 0
+
+    raining_chunks = df[df["raining"] == 1].groupby("flood_no")
+
+    # we aggregate based on specific functions for each field
+    aggregated_chunks = raining_chunks.agg(
+        {
+            "season": "first",
+            "flood_length": "size",
+            "price": "mean",
+            "flood_silo_pinto": "sum",
+            "flood_field_pinto": "sum",
+            "total_flood_pinto": "sum",
+            "delta_pinto": "sum",
+            "gm_reward": "sum",
+            "twa_minted_pinto": "sum",
+        }
+    )
+
+    # drop aggregated chunks with less than 2 seasons
+    aggregated_chunks = aggregated_chunks[aggregated_chunks["flood_length"] > 1]
+
+    # we re-index the dataframe to start from 1
+    aggregated_chunks.reset_index(drop=True, inplace=True)
+    aggregated_chunks.index = aggregated_chunks.index + 1
+
+    # remove one from flood length to not include the raining season
+    aggregated_chunks["flood_length"] -= 1
+
+    aggregated_chunks.rename(
+        columns={
+            "season": "raining_season",
+            "price": "average_price",
+        },
+        inplace=True,
+    )
+    return aggregated_chunks
+
+
+class FloodSeasons(NamedTuple):
+    columns: dict[str, np.ndarray]
+    # the seasons of flood `i` (0-indexed) live in rows [offsets[i], offsets[i + 1])
+    offsets: np.ndarray
+
+    @property
+    def floods(self) -> int:
+        return len(self.offsets) - 1
+
+    def block(self, flood: int) -> slice:
+        return slice(self.offsets[flood], self.offsets[flood + 1])
+
+    def column(self, flood: int, column: str) -> np.ndarray:
+        return self.columns[column][self.block(flood)]
+
+    def frame(self, flood: int, points: Sequence[int] | None = None) -> pd.DataFrame:
+        """The seasons of a flood, optionally only the given positions within it."""
+
+        block = self.block(flood)
+        return pd.DataFrame(
+            {
+                column: values[block] if points is None else values[block][points]
+                for column, values in self.columns.items()
+            }
+        )
+
+    def take(
+        self, flood: int, columns: Sequence[str], points: Sequence[int]
+    ) -> np.ndarray:
+        """A (points x columns) array of the given seasons within a flood."""
+
+        block = self.block(flood)
+        return np.column_stack([self.columns[c][block][points] for c in columns])
+
+    def sum(
+        self, flood: int, column: str, points: Sequence[int] | None = None
+    ) -> float:
+        values = self.column(flood, column)
+        return float(values.sum() if points is None else values[points].sum())
+
+
+def build_flood_seasons(
+    df: pd.DataFrame, columns: Sequence[str] = FLOOD_SEASON_COLUMNS
+) -> FloodSeasons:
+    """Builds the ragged store from a season frame already chunked by
+    `calculate_flood_details`, keeping the same floods (raining chunks of 2+ seasons).
+    """
+
+    raining = df["raining"].eq(1)
+    chunk_size = df.groupby("flood_no")["flood_no"].transform("size")
+    rows = df.loc[raining & chunk_size.gt(1)]
+
+    sizes = rows.groupby("flood_no", sort=True).size().to_numpy()
+    offsets = np.concatenate([[0], np.cumsum(sizes)])
+    arrays = {
+        column: rows[column].to_numpy(dtype=float, na_value=np.nan)
+        for column in columns
+    }
+    for column in ("season", "timestamp"):
+        if column in arrays:
+            arrays[column] = arrays[column].astype(int)
+    return FloodSeasons(arrays, offsets)
@@ -0,0 +1,104 @@
+"""
+Forecasts when a place in the pod line becomes harvestable. The harvestable index moves
+ through regular field returns and flood field returns, both are tracked as exponentially
+ weighted velocities that are folded forward one season at a time.
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+SEASON_SECONDS = 60 * 60
+HALF_LIFE = 24 * 7  # in seasons
+
+
+class ForecastState(NamedTuple):
+    season: int
+    timestamp: int
+    harvestable_index: float
+    base_velocity: float  # pods per season made harvestable outside of floods
+    flood_velocity: float  # pods per season made harvestable by flood field returns
+
+    @property
+    def velocity(self) -> float:
+        return self.base_velocity + self.flood_velocity
+
+
+def _ewma(previous: float | None, values: np.ndarray, alpha: float) -> float:
+    """Folds `values` into an exponentially weighted average in one vectorized step."""
+
+    if previous is None:
+        previous, values = values[0], values[1:]
+    decay = (1 - alpha) ** np.arange(len(values) - 1, -1, -1)
+    return float((1 - alpha) ** len(values) * previous + alpha * (decay @ values))
+
+
+class HarvestForecaster:
+    """Keeps the fitted velocity state and advances it only over unseen seasons."""
+
+    def __init__(self, half_life: float = HALF_LIFE):
+        self.alpha = 1 - 0.5 ** (1 / half_life)
+        self.state: ForecastState | None = None
+
+    def update(self, df: pd.DataFrame) -> ForecastState | None:
+        new = df if self.state is None else df[df["season"] > self.state.season]
+        if new.empty:
+            return self.state
+
+        def _values(column: str) -> np.ndarray:
+            return np.nan_to_num(new[column].to_numpy(dtype=float, na_value=np.nan))
+
+        flood = _values("flood_field_pinto")
+        base = np.maximum(_values("delta_harvestable_index") - flood, 0)
+
+        latest = new.iloc[-1]
+        previous = self.state
+        self.state = ForecastState(
+            season=int(latest["season"]),
+            timestamp=int(latest["timestamp"]),
+            harvestable_index=float(latest["harvestable_index"]),
+            base_velocity=_ewma(previous and previous.base_velocity, base, self.alpha),
+            flood_velocity=_ewma(
+                previous and previous.flood_velocity, flood, self.alpha
+            ),
+        )
+        return self.state
+
+    def seasons_until(self, index: float | np.ndarray) -> float | np.ndarray:
+        """Seasons until the given pod index(es) become harvestable, `inf` if the line
+        isn't moving.
+        """
+
+        remaining = np.maximum(
+            np.asarray(index, dtype=float) - self.state.harvestable_index, 0
+        )
+        with np.errstate(divide="ignore", invalid="ignore"):
+            seasons = np.where(
+                remaining > 0,
+                remaining / self.state.velocity if self.state.velocity > 0 else np.inf,
+                0.0,
+            )
+        return seasons if np.ndim(index) else float(seasons)
+
+    def harvestable_at(self, index: float | np.ndarray) -> pd.Timestamp | np.ndarray:
+        """Estimated datetime(s) at which the given pod index(es) become harvestable,
+        `NaT` if the line isn't moving.
+        """
+
+        seasons = np.asarray(self.seasons_until(index))
+        nanos = (self.state.timestamp + seasons * SEASON_SECONDS) * 10**9
+        harvestable_at = np.where(np.isfinite(nanos), nanos, np.nan).astype(
+            "datetime64[ns]"
+        )
+        return harvestable_at if np.ndim(index) else pd.Timestamp(harvestable_at[()])
+
+
+@st.cache_resource
+def harvest_forecaster(source: str) -> HarvestForecaster:
+    """One forecaster per source shared across sessions, advanced whenever new seasons
+    land.
+    """
+
+    return HarvestForecaster()
@@ -0,0 +1,244 @@
+"""
+Versioned snapshots of every source, so the data can be looked at as it was at any past
+ season. Season frames are stored as immutable, content addressed chunks of
+ `SEASON_BLOCK` seasons that every version containing them shares, the still open block
+ in chunks of `TAIL_BLOCK` seasons, and each version only stores the plot rows that
+ changed since the previous one, so months of versions cost little more than the latest
+ snapshot. The app and a standalone API may record the same
+ source, so versions are appended under a file lock after re-reading the manifest.
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from functools import partial
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from ingest import to_frame
+from query_cache import SEASON_BLOCK
+from sources import Source, resident_stores
+from sync import seconds
+
+HISTORY_DIR = Path(
+    os.environ.get(
+        "PINTO_HISTORY_DIR", Path.home() / ".cache" / "pinto-analysis" / "history"
+    )
+)
+# the open block changes on every version, so it's split into small chunks of which
+# only the last one is usually rewritten (a divisor of `SEASON_BLOCK`)
+TAIL_BLOCK = 25
+
+
+class Version(NamedTuple):
+    version: str
+    season: int  # the head season it was recorded at
+    recorded_at: int
+    chunks: list[str]  # season chunk files, in season order
+    plots: str | None  # file of the plot rows changed since the previous version
+
+
+class Snapshot(NamedTuple):
+    df: pd.DataFrame
+    plots: pd.DataFrame
+    version: str
+    season: int
+
+
+def _write(table: pa.Table, path: Path):
+    # write then rename, so concurrent readers never see a partial file
+    tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    pq.write_table(table, tmp, compression="zstd")
+    os.replace(tmp, path)
+
+
+class SnapshotHistory:
+    """The versions of a single source, recorded on every data refresh."""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        (self.directory / "seasons").mkdir(parents=True, exist_ok=True)
+        (self.directory / "plots").mkdir(exist_ok=True)
+        self._manifest = self.directory / "manifest.json"
+        self._lock = threading.Lock()
+
+        self.versions: list[Version] = []
+        self._manifest_mtime = 0
+        # the `updated_at` of every plot as of the latest version, to find what changed
+        self._updated_at = pd.Series(dtype=np.int64)
+        self._reload()
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Excludes the other threads and processes recording this source."""
+
+        with self._lock, open(self.directory / ".lock", "a") as lock:
+            # released when the file is closed
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    def _reload(self):
+        """Picks up the versions other processes appended since the last read."""
+
+        try:
+            mtime = self._manifest.stat().st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == self._manifest_mtime:
+            return
+
+        versions = [
+            Version(**version) for version in json.loads(self._manifest.read_text())
+        ]
+        # versions are only ever appended
+        new = versions[len(self.versions) :]
+        self.versions, self._manifest_mtime = versions, mtime
+        stamps = self._plot_stamps(self._plot_files(new))
+        if self._updated_at.empty:
+            self._updated_at = stamps
+        elif not stamps.empty:
+            self._updated_at = stamps.combine_first(self._updated_at).astype(np.int64)
+
+    def _plot_stamps(self, files: list[str]) -> pd.Series:
+        if not files:
+            return pd.Series(dtype=np.int64)
+        stamps = to_frame(ds.dataset(files).to_table(columns=["id", "updated_at"]))
+        stamps = stamps.sort_values("updated_at", kind="stable")
+        stamps = stamps.drop_duplicates("id", keep="last")
+        return pd.Series(seconds(stamps["updated_at"]), index=stamps["id"])
+
+    def _plot_files(self, versions: list[Version]) -> list[str]:
+        return [str(self.directory / "plots" / v.plots) for v in versions if v.plots]
+
+    def _read_plots(self, files: list[str]) -> pd.DataFrame:
+        """The latest row of every plot out of the rows stored by several versions."""
+
+        if not files:
+            every = self._plot_files(self.versions)
+            if not every:
+                return pd.DataFrame()
+            return to_frame(ds.dataset(every[:1]).schema.empty_table())
+
+        plots = to_frame(ds.dataset(files).to_table())
+        plots = plots.sort_values("updated_at", kind="stable")
+        plots = plots.drop_duplicates("id", keep="last")
+        return plots.sort_values("index", ignore_index=True)
+
+    def _store_chunk(self, start: int, chunk: pd.DataFrame) -> str:
+        """Stores a block of seasons under the hash of its contents, once."""
+
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        digest = hashlib.sha256(sink.getvalue()).hexdigest()[:32]
+
+        name = f"{start}-{digest}.parquet"
+        if not (self.directory / "seasons" / name).exists():
+            _write(table, self.directory / "seasons" / name)
+        return name
+
+    def _save(self):
+        tmp = self._manifest.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps([v._asdict() for v in self.versions]))
+        os.replace(tmp, self._manifest)
+        self._manifest_mtime = self._manifest.stat().st_mtime_ns
+
+    def record(self, version: str, df: pd.DataFrame, plots: pd.DataFrame) -> Version:
+        """Records a refresh as a new version, unless it already was.
+
+        Only the season chunks whose contents changed (usually just the last few
+         seasons) and the plots whose `updated_at` moved are written.
+        """
+
+        with self._locked():
+            self._reload()
+            for recorded in self.versions:
+                if recorded.version == version:
+                    return recorded
+
+            seasons = df["season"].to_numpy(dtype=np.int64)
+            open_block = seasons[-1] // SEASON_BLOCK * SEASON_BLOCK
+            starts = np.where(
+                seasons < open_block,
+                seasons // SEASON_BLOCK * SEASON_BLOCK,
+                seasons // TAIL_BLOCK * TAIL_BLOCK,
+            )
+            chunks = [
+                self._store_chunk(int(start), chunk)
+                for start, chunk in df.groupby(starts)
+            ]
+
+            stamps = seconds(plots["updated_at"])
+            changed = stamps != self._updated_at.reindex(plots["id"]).to_numpy()
+            name = None
+            if changed.any():
+                digest = hashlib.sha256(version.encode()).hexdigest()[:16]
+                name = f"{digest}-{os.getpid()}.parquet"
+                _write(
+                    pa.Table.from_pandas(plots[changed], preserve_index=False),
+                    self.directory / "plots" / name,
+                )
+            # plots are never removed, so the latest frame holds every plot
+            self._updated_at = pd.Series(stamps, index=plots["id"].to_numpy())
+
+            recorded = Version(
+                version,
+                int(df["season"].iloc[-1]),
+                int(time.time()),
+                chunks,
+                name,
+            )
+            self.versions.append(recorded)
+            self._save()
+            return recorded
+
+    def version_at(self, season: int) -> Version:
+        """The latest version recorded by `season`."""
+
+        with self._lock:
+            self._reload()
+        for version in reversed(self.versions):
+            if version.season <= season:
+                return version
+        raise KeyError(f"no version was recorded by season {season}")
+
+    def as_of(self, season: int) -> Snapshot:
+        """The season and plots frames as they were at `season`."""
+
+        version = self.version_at(season)
+        versions = self.versions[: self.versions.index(version) + 1]
+
+        seasons = ds.dataset(
+            [str(self.directory / "seasons" / chunk) for chunk in version.chunks]
+        )
+        df = to_frame(seasons.to_table(filter=ds.field("season") <= season))
+        plots = self._read_plots(self._plot_files(versions))
+        return Snapshot(df, plots, version.version, season)
+
+    def changed_plots(self, start: int, end: int) -> pd.DataFrame:
+        """The latest version of the plots that changed after `start`, up to `end`."""
+
+        with self._lock:
+            self._reload()
+        versions = [v for v in self.versions if start < v.season <= end]
+        return self._read_plots(self._plot_files(versions))
+
+    def memory_usage(self) -> int:
+        return int(self._updated_at.memory_usage(deep=True))
+
+
+def snapshot_history(source: Source) -> SnapshotHistory:
+    return resident_stores().get(
+        source.name, "history", partial(SnapshotHistory, HISTORY_DIR / source.name)
+    )
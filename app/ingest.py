@@ -0,0 +1,140 @@
+"""
+Streaming ingestion of subgraph pages. Each page is decoded into an Arrow record batch as
+ soon as it arrives, so peak memory is bounded by the page size rather than the history.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Collection, Iterable, Iterator, Sequence
+from typing import TYPE_CHECKING, NamedTuple
+
+import pandas as pd
+import pyarrow as pa
+from pandas.api.types import is_numeric_dtype
+
+if TYPE_CHECKING:
+    from subgrounds import FieldPath, Subgrounds
+
+# columns holding raw strings that should never be coerced into numbers, entities with
+# other string columns pass their own
+STRING_COLUMNS = frozenset({"id", "source", "farmer"})
+
+
+def _types_mapper(dtype: pa.DataType) -> pd.ArrowDtype | None:
+    # timestamps stay as numpy datetimes so `.dt` accessors behave as before
+    if pa.types.is_timestamp(dtype):
+        return None
+    return pd.ArrowDtype(dtype)
+
+
+def decode_page(
+    page: pd.DataFrame,
+    decimals: Iterable[str] = (),
+    timestamps: Iterable[str] = (),
+    strings: Collection[str] = STRING_COLUMNS,
+) -> pa.RecordBatch:
+    """Decodes a single raw page of subgraph results into an Arrow record batch."""
+
+    for column in page.columns:
+        if column not in strings and not is_numeric_dtype(page[column]):
+            page[column] = pd.to_numeric(page[column], errors="coerce")
+
+    # apply decimals to whichever of the columns are present in this page
+    for column in page.columns.intersection(list(decimals)):
+        page[column] = page[column] / 10**6
+
+    for column in page.columns.intersection(list(timestamps)):
+        page[column] = pd.to_datetime(page[column], unit="s")
+
+    return pa.RecordBatch.from_pandas(page, preserve_index=False)
+
+
+def stream_pages(
+    sg: Subgrounds, fpaths: Sequence[FieldPath], columns: Sequence[str]
+) -> Iterator[pd.DataFrame]:
+    """Yields each page of a single entity query as a DataFrame with named columns."""
+
+    for page in sg.query_df_iter(list(fpaths)):
+        yield page.set_axis(list(columns), axis=1)
+
+
+def collect(
+    pages: Iterable[pd.DataFrame],
+    columns: Sequence[str],
+    decimals: Iterable[str] = (),
+    timestamps: Iterable[str] = (),
+    strings: Collection[str] = STRING_COLUMNS,
+) -> pd.DataFrame:
+    """Decodes pages into record batches as they arrive and assembles the final frame.
+
+    Only the decoded Arrow buffers are kept around, each raw page is released as soon as
+     the next one is requested.
+    """
+
+    decimals, timestamps = list(decimals), list(timestamps)
+    tables = [
+        pa.Table.from_batches([decode_page(page, decimals, timestamps, strings)])
+        for page in pages
+    ]
+    if not tables:
+        return pd.DataFrame(columns=list(columns))
+
+    return to_frame(pa.concat_tables(tables, promote_options="permissive"))
+
+
+def to_frame(table: pa.Table) -> pd.DataFrame:
+    """Converts a decoded arrow table into a pyarrow backed DataFrame."""
+
+    return table.to_pandas(types_mapper=_types_mapper)
+
+
+class SnapshotGaps(NamedTuple):
+    """Seasons missing from a snapshot entity, before and after backfilling."""
+
+    detected: list[int]
+    unresolved: list[int]
+
+
+def dedupe_snapshots(
+    snapshots: pd.DataFrame, season: str, updated_at: str
+) -> pd.DataFrame:
+    """Keeps only the most recently updated snapshot for each season."""
+
+    return (
+        snapshots.sort_values([season, updated_at], kind="stable")
+        .drop_duplicates(season, keep="last")
+        .reset_index(drop=True)
+    )
+
+
+def find_gaps(seasons: pd.Series, snapshot_seasons: pd.Series) -> list[int]:
+    """Returns the seasons that have no matching snapshot."""
+
+    return [int(s) for s in seasons[~seasons.isin(snapshot_seasons)]]
+
+
+def reconcile_snapshots(
+    snapshots: pd.DataFrame,
+    seasons: pd.Series,
+    season: str,
+    updated_at: str,
+    backfill: Callable[[list[int]], pd.DataFrame],
+) -> tuple[pd.DataFrame, SnapshotGaps]:
+    """Reduces hourly snapshots to exactly one row per season.
+
+    Duplicates are resolved by taking the latest `updated_at`, and only the seasons that
+     are missing get re-queried through `backfill`. The `updated_at` column is dropped.
+    """
+
+    snapshots = dedupe_snapshots(snapshots, season, updated_at)
+    detected = find_gaps(seasons, snapshots[season])
+
+    if detected:
+        filled = backfill(detected)
+        if not filled.empty:
+            snapshots = dedupe_snapshots(
+                pd.concat([snapshots, filled], ignore_index=True), season, updated_at
+            )
+
+    unresolved = find_gaps(seasons, snapshots[season]) if detected else []
+    return snapshots.drop(columns=updated_at), SnapshotGaps(detected, unresolved)
@@ -0,0 +1,329 @@
+"""
+Load test of the app as it is served. A real Streamlit server is started on recorded
+ subgraph responses, and N concurrent websocket sessions are driven through the homepage,
+ the Flood Inspector (changing the flood number) and Field Analytics (changing the pod
+ index) the way browsers drive it. Rerun latency percentiles and the server's CPU and
+ memory per session are reported.
+
+    uv run python app/loadtest.py --record app/snapshot  # once, from the subgraph
+    uv run python app/loadtest.py --sessions 16
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import numpy as np
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.NumberInput_pb2 import NumberInput
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+from tornado.websocket import WebSocketClientConnection, websocket_connect
+
+APP_DIR = Path(__file__).parent
+PORT = 8599
+TIMEOUT = 120  # seconds per rerun
+STARTUP_TIMEOUT = 60  # seconds for the server to come up
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+
+# every local store starts empty, so the server goes through ingest and its caches
+STORE_DIRS = [
+    "PINTO_CACHE_DIR",
+    "PINTO_HISTORY_DIR",
+    "PINTO_TIMESERIES_DIR",
+    "PINTO_WAREHOUSE_DIR",
+]
+
+
+def _key(url: str, blob: dict) -> str:
+    return json.dumps([url, blob], sort_keys=True)
+
+
+def _pin_page_size():
+    # pages are sized by response latency, which would change the queries of a replay
+    import pagination
+
+    pagination.PageSizer.observe = lambda self, rows, elapsed, payload: None
+
+
+def record(directory: Path):
+    """Records every subgraph response of a full refresh of the default source."""
+
+    from data import gather_data, season_head
+    from sources import DEFAULT_SOURCE, SOURCES
+    from subgrounds import Subgrounds
+
+    responses = {}
+    fetch = Subgrounds._fetch
+
+    def _fetch(self, url: str, blob: dict) -> dict:
+        responses[_key(url, blob)] = response = fetch(self, url, blob)
+        return response
+
+    Subgrounds._fetch = _fetch
+    _pin_page_size()
+
+    source = SOURCES[DEFAULT_SOURCE]
+    head = season_head(source)
+    gather_data(source)
+
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / "head.json").write_text(json.dumps(head._asdict()))
+    with gzip.open(directory / "responses.json.gz", "wt") as f:
+        json.dump(responses, f)
+
+
+def replay(directory: Path):
+    """Answers subgraph queries from the recording, at the network boundary only.
+
+    The head is pinned to the recorded one, and the exchange and price series (which
+     query by wall clock time) don't sync.
+    """
+
+    import data
+    import exchange
+    import timeseries
+    from subgrounds import Subgrounds
+
+    with gzip.open(directory / "responses.json.gz", "rt") as f:
+        responses = json.load(f)
+    head = data.SeasonHead(**json.loads((directory / "head.json").read_text()))
+
+    def _fetch(self, url: str, blob: dict) -> dict:
+        try:
+            return responses[_key(url, blob)]
+        except KeyError:
+            raise RuntimeError(f"no recorded response for a query to {url}") from None
+
+    Subgrounds._fetch = _fetch
+    _pin_page_size()
+    data.season_head = lambda source: head
+    exchange.ExchangeStore.sync = lambda self, force=False: None
+    timeseries.TimeSeriesStore.sync = lambda self, force=False: None
+
+
+def serve(directory: Path, port: int):
+    """Runs the app on the recording, in this process."""
+
+    from streamlit.web import bootstrap
+
+    replay(directory)
+    flags = {
+        "server_port": port,
+        "server_headless": True,
+        "server_fileWatcherType": "none",
+        "browser_gatherUsageStats": False,
+    }
+    bootstrap.load_config_options(flags)
+    bootstrap.run(str(APP_DIR / "main.py"), False, [], flags)
+
+
+class Session:
+    """A single browser tab, speaking the app's websocket protocol."""
+
+    def __init__(self, connection: WebSocketClientConnection):
+        self.connection = connection
+        self.pages: dict[str, str] = {}  # url path -> page script hash
+        self.page = ""
+        # label -> (widget, fragment it is rendered in)
+        self.inputs: dict[str, tuple[NumberInput, str]] = {}
+
+    @classmethod
+    async def connect(cls, port: int) -> "Session":
+        connection = await websocket_connect(
+            f"ws://localhost:{port}/_stcore/stream", subprotocols=["streamlit"]
+        )
+        return cls(connection)
+
+    async def rerun(
+        self, page: str | None = None, widget: WidgetState | None = None
+    ) -> float:
+        """Reruns the app (or the fragment holding `widget`), returning the seconds
+        until the run finished.
+        """
+
+        if page is not None:
+            self.page = self.pages[page]
+        msg = BackMsg()
+        msg.rerun_script.page_script_hash = self.page
+        if widget is not None:
+            msg.rerun_script.widget_states.widgets.append(widget)
+            label = next(k for k, (w, _) in self.inputs.items() if w.id == widget.id)
+            msg.rerun_script.fragment_id = self.inputs[label][1]
+
+        start = time.perf_counter()
+        await self.connection.write_message(msg.SerializeToString(), binary=True)
+        async with asyncio.timeout(TIMEOUT):
+            while not await self._receive():
+                pass
+        return time.perf_counter() - start
+
+    async def _receive(self) -> bool:
+        """Handles one message from the server, true once the run has finished."""
+
+        payload = await self.connection.read_message()
+        if payload is None:
+            raise ConnectionError("the server closed the session")
+
+        msg = ForwardMsg()
+        msg.ParseFromString(payload)
+        kind = msg.WhichOneof("type")
+        if kind == "navigation":
+            self.pages = {
+                page.url_pathname: page.page_script_hash
+                for page in msg.navigation.app_pages
+            }
+        elif kind == "delta" and msg.delta.WhichOneof("type") == "new_element":
+            element = msg.delta.new_element
+            if element.WhichOneof("type") == "number_input":
+                self.inputs[element.number_input.label] = (
+                    element.number_input,
+                    msg.delta.fragment_id,
+                )
+            elif element.WhichOneof("type") == "exception":
+                raise RuntimeError(element.exception.message)
+        elif kind == "script_finished":
+            if msg.script_finished == ForwardMsg.FINISHED_WITH_COMPILE_ERROR:
+                raise RuntimeError("the page failed to compile")
+            # a run interrupted by a newer one keeps going under the new run
+            return msg.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN
+        return False
+
+    def number_input(self, label: str, value: float) -> WidgetState:
+        widget = self.inputs[label][0]
+        state = WidgetState(id=widget.id)
+        if widget.data_type == NumberInput.INT:
+            state.int_value = int(value)
+        else:
+            state.double_value = float(value)
+        return state
+
+
+async def session(port: int, iterations: int, latencies: list[float]):
+    """One viewer: homepage, then flood numbers, then pod indexes."""
+
+    tab = await Session.connect(port)
+    try:
+        latencies.append(await tab.rerun())
+
+        latencies.append(await tab.rerun("flood"))
+        floods = int(tab.inputs["Flood Number"][0].max)
+        for flood in np.linspace(1, floods, iterations, dtype=int):
+            widget = tab.number_input("Flood Number", flood)
+            latencies.append(await tab.rerun(widget=widget))
+
+        latencies.append(await tab.rerun("field"))
+        end = tab.inputs["Pod Index"][0].default
+        for index in np.linspace(0, end, iterations):
+            widget = tab.number_input("Pod Index", index)
+            latencies.append(await tab.rerun(widget=widget))
+    finally:
+        tab.connection.close()
+
+
+def _usage(pid: int) -> tuple[float, float]:
+    """CPU seconds and resident MB of a process."""
+
+    with open(f"/proc/{pid}/stat") as f:
+        # the process name may contain spaces, fields are counted after it
+        fields = f.read().rsplit(")", 1)[1].split()
+    cpu = (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+    with open(f"/proc/{pid}/status") as f:
+        status = dict(line.split(":", 1) for line in f)
+    return cpu, int(status["VmRSS"].split()[0]) / 1024
+
+
+def load_test(port: int, pid: int, sessions: int, iterations: int) -> dict[str, float]:
+    latencies: list[float] = []
+
+    async def _sessions():
+        await asyncio.gather(
+            *(session(port, iterations, latencies) for _ in range(sessions))
+        )
+
+    cpu, rss = _usage(pid)
+    start = time.perf_counter()
+    asyncio.run(_sessions())
+    elapsed = time.perf_counter() - start
+    cpu_after, rss_after = _usage(pid)
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        "sessions": sessions,
+        "reruns": len(latencies),
+        "elapsed (s)": elapsed,
+        "reruns per second": len(latencies) / elapsed,
+        "p50 (s)": p50,
+        "p95 (s)": p95,
+        "p99 (s)": p99,
+        "server cpu per session (s)": (cpu_after - cpu) / sessions,
+        "server rss growth per session (MB)": (rss_after - rss) / sessions,
+        "server rss (MB)": rss_after,
+    }
+
+
+def _wait_until_up(port: int, server: subprocess.Popen):
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("the server exited while starting")
+        try:
+            with urllib.request.urlopen(f"http://localhost:{port}/_stcore/health"):
+                return
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.5)
+    raise TimeoutError(f"the server didn't start within {STARTUP_TIMEOUT}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--snapshot", type=Path, default=APP_DIR / "snapshot")
+    parser.add_argument("--record", type=Path, help="record a snapshot and exit")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--iterations", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.snapshot, args.port)
+        return
+
+    with tempfile.TemporaryDirectory() as stores:
+        # the app reads these when imported, by the recording or the server
+        env = os.environ | {name: str(Path(stores) / name) for name in STORE_DIRS}
+        if args.record:
+            os.environ.update(env)
+            record(args.record)
+            return
+
+        server = subprocess.Popen(
+            [sys.executable, __file__, "--serve", "--snapshot", str(args.snapshot)]
+            + ["--port", str(args.port)],
+            env=env,
+            stdout=subprocess.DEVNULL,
+        )
+        try:
+            _wait_until_up(args.port, server)
+            # a single warm-up session fills the server's shared caches first
+            load_test(args.port, server.pid, 1, 1)
+            results = load_test(args.port, server.pid, args.sessions, args.iterations)
+        finally:
+            server.terminate()
+            server.wait()
+
+    for name, value in results.items():
+        print(f"{name:<36} {value:,.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,8 @@
+import os
+
 import streamlit as st
-from data import gather_data
+from data import HEAD_INTERVAL, gather_data
+from sources import SOURCES, current_source, resident_stores
 from st_copy_to_clipboard import st_copy_to_clipboard
 
 
@@ -77,6 +80,23 @@ def disclaimers():
         )
 
 
+def source_picker():
+    """Switches between deployments, only shown when more than one is registered."""
+
+    if len(SOURCES) < 2:
+        return
+
+    names = list(SOURCES)
+    source = st.sidebar.selectbox(
+        "Deployment",
+        names,
+        index=names.index(current_source().name),
+        format_func=lambda name: SOURCES[name].label,
+        key="source",
+    )
+    st.query_params["source"] = source
+
+
 def main():
     """This drives the entire streamlit application"""
 
@@ -93,11 +113,39 @@ def main():
     )
 
     custom_css()
+    source_picker()
+
+    # the data API shares this process' snapshots when enabled
+    if port := os.environ.get("PINTO_API_PORT"):
+        from api import start_api
+
+        start_api(int(port))
 
-    data = gather_data()
+    data = gather_data(current_source())
 
     with st.expander("Data Debug"):
         st.write(data.latest_season)
+        st.caption(
+            "Head: season {}, indexed block {}, checked every {}s".format(
+                data.head.season, data.head.block, HEAD_INTERVAL
+            )
+        )
+        stores = resident_stores()
+        st.caption(
+            "Resident sources: {} ({:,.0f} of {:,.0f} MB)".format(
+                ", ".join(stores.resident),
+                stores.memory_usage() / 1024**2,
+                stores.budget / 1024**2,
+            )
+        )
+        for entity, gaps in data.gaps.items():
+            if gaps.unresolved:
+                st.warning(
+                    f"{entity} is missing {len(gaps.unresolved)} season(s): "
+                    + ", ".join(map(str, gaps.unresolved))
+                )
+            elif gaps.detected:
+                st.info(f"{entity} backfilled {len(gaps.detected)} missing season(s)")
 
     with st.sidebar:
         left, right = st.columns(2, vertical_alignment="center")
@@ -110,6 +158,12 @@ def main():
         st.markdown(
             "🌱 **Current Season** ・ {}".format(int(data.latest_season["season"]))
         )
+        if data.is_raining:
+            st.markdown("🌧️ **Raining**")
+        elif data.seasons_since_rain is not None:
+            st.markdown(
+                "☀️ **Last Rain** ・ {} seasons ago".format(data.seasons_since_rain)
+            )
         price = float(data.latest_season["price"])
         color = "#72be95" if price > 1 else "#e57373"
         st.markdown(
@@ -137,6 +191,9 @@ def main():
                 st.Page("protocol.py", title="🏗️ Protocol Overview"),
                 st.Page("flood.py", title="🌊 Flood Inspector"),
                 st.Page("field.py", title="🌾 Field Analytics"),
+                st.Page("silo.py", title="🏛️ Silo Analytics"),
+                st.Page("farmers.py", title="🧑‍🌾 Farmer Leaderboard"),
+                st.Page("query.py", title="🔎 SQL Query"),
                 # st.Page("portfolio.py", title="📊 Portfolio Viewer"),
             ],
         }
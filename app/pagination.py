@@ -0,0 +1,116 @@
+"""
+Cursor based pagination for the fastest growing entities (e.g. plots, trades). Pages are
+ keyed on `(orderBy, id)` so a failed request resumes from the last cursor instead of
+ restarting the whole query, and the page size adapts to the latency and payload of each
+ response.
+"""
+
+import time
+from collections.abc import Callable, Iterator
+from typing import NamedTuple
+
+import pandas as pd
+from httpx import HTTPError
+from subgrounds.errors import SubgroundsError
+
+MIN_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000  # graph-node rejects `first` above this
+TARGET_LATENCY = 2.0  # seconds per page
+MAX_PAYLOAD = 4 * 1024**2  # bytes per decoded page
+
+
+class Cursor(NamedTuple):
+    value: int  # of the `orderBy` field
+    id: str
+
+
+def cursor_where(
+    where: dict,
+    cursor: Cursor | None,
+    order_by: str = "createdAt",
+    direction: str = "desc",
+) -> dict:
+    """Filters a query ordered by `order_by` down to the rows after the cursor.
+
+    graph-node breaks `orderBy` ties on `id` in the same direction, so rows sharing the
+     cursor's value are resumed through `id_lt` (or `id_gt` when ascending).
+    """
+
+    if cursor is None:
+        return where
+
+    op = "lt" if direction == "desc" else "gt"
+    after = {
+        "or": [
+            {f"{order_by}_{op}": cursor.value},
+            {order_by: cursor.value, f"id_{op}": cursor.id},
+        ]
+    }
+    return {"and": [where, after]} if where else after
+
+
+class PageSizer:
+    """Grows the page size while responses are fast and small, and shrinks it as soon as
+    they get slow, heavy or fail.
+    """
+
+    def __init__(
+        self,
+        size: int = MAX_PAGE_SIZE // 2,
+        target_latency: float = TARGET_LATENCY,
+        max_payload: int = MAX_PAYLOAD,
+    ):
+        self.size = size
+        self.target_latency = target_latency
+        self.max_payload = max_payload
+
+    def observe(self, rows: int, elapsed: float, payload: int):
+        if elapsed > self.target_latency or payload > self.max_payload:
+            self.backoff()
+        elif rows >= self.size and elapsed < self.target_latency / 2:
+            self.size = min(MAX_PAGE_SIZE, self.size * 2)
+
+    def backoff(self):
+        self.size = max(MIN_PAGE_SIZE, self.size // 2)
+
+
+def iter_cursor_pages(
+    fetch: Callable[[Cursor | None, int], pd.DataFrame],
+    cursor_columns: tuple[str, str] = ("created_at", "id"),
+    sizer: PageSizer | None = None,
+    retries: int = 3,
+) -> Iterator[pd.DataFrame]:
+    """Yields raw pages from `fetch(cursor, first)` until the entity is exhausted.
+
+    The cursor is read from the last row of each page before it is yielded, so callers
+     are free to decode the page in place.
+    """
+
+    sizer = sizer or PageSizer()
+    cursor = None
+
+    while True:
+        for attempt in range(retries + 1):
+            first = sizer.size
+            start = time.perf_counter()
+            try:
+                page = fetch(cursor, first)
+                break
+            except (OSError, HTTPError, SubgroundsError):
+                if attempt == retries:
+                    raise
+                # retry the same cursor with a smaller page
+                sizer.backoff()
+                time.sleep(2**attempt)
+
+        elapsed = time.perf_counter() - start
+        sizer.observe(len(page), elapsed, int(page.memory_usage(deep=True).sum()))
+        if page.empty:
+            return
+
+        value, id_ = cursor_columns
+        cursor = Cursor(int(page[value].iloc[-1]), str(page[id_].iloc[-1]))
+        yield page
+
+        if len(page) < first:
+            return
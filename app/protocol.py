@@ -3,22 +3,78 @@ General protocol-level analytics (should match / follow analytics in the data se
  the pinto.money website).
 """
 
+import time
+
+import plotly.graph_objects as go
 import streamlit as st
 from data import gather_data
-from utils import M as M
+from exchange import exchange_data
+from millify import millify
+from sources import current_source
+from utils import M, metrics
+
+DAY_SECONDS = 60 * 60 * 24
+
+
+def liquidity_overview():
+    exchange = exchange_data()
+    now = int(time.time())
+
+    metrics(
+        M("Liquidity", "${}".format(millify(exchange.total_liquidity, 2))),
+        M(
+            "24h Volume",
+            "${}".format(millify(exchange.volume(now - DAY_SECONDS, now), 2)),
+        ),
+        M(
+            "7d Volume",
+            "${}".format(millify(exchange.volume(now - 7 * DAY_SECONDS, now), 2)),
+        ),
+    )
+
+    hourly = exchange.hourly()
+    if hourly.empty:
+        return
+
+    fig = go.Figure()
+    fig.add_trace(
+        go.Scatter(
+            x=hourly["datetime"],
+            y=hourly["liquidity_usd"],
+            mode="lines",
+            name="Liquidity",
+            marker=dict(color="rgba(34, 139, 34, 0.75)"),
+        )
+    )
+    fig.add_trace(
+        go.Bar(
+            x=hourly["datetime"],
+            y=hourly["volume_usd"],
+            name="Volume",
+            marker_color="rgba(70, 130, 180, 0.75)",
+            yaxis="y2",
+        )
+    )
+    fig.update_layout(
+        title="Hourly Liquidity and Volume",
+        yaxis=dict(title="Liquidity (USD)"),
+        yaxis2=dict(title="Volume (USD)", overlaying="y", side="right"),
+    )
+    st.plotly_chart(fig)
 
 
 def main():
-    data = gather_data()
+    data = gather_data(current_source())
+    latest_season = data.latest_season
 
     st.title("🏗️ Protocol Overview")
     st.write("This page is very much WIP, it'll be cleaned up soon!")
     st.subheader("Latest Season")
-    # metrics(
-    #     M("Price", f"${latest_season['price']:.6f}"),
-    #     M("Marketcap", "${}".format(millify(latest_season["market_cap"], 2))),
-    #     # M("Liquidity", "${}".format(millify(latest_season["market_cap"], 2))),
-    # )
+    metrics(
+        M("Price", f"${latest_season['price']:.6f}"),
+        M("Marketcap", "${}".format(millify(latest_season["market_cap"], 2))),
+    )
+    liquidity_overview()
     # metrics(
     #     M("Season", latest_season["season"]),
     #     M("Raining", latest_season["raining"]),
@@ -0,0 +1,92 @@
+"""
+Ad-hoc SQL over the current snapshot, for questions no page answers yet.
+"""
+
+import importlib.util
+
+import streamlit as st
+from data import Data, gather_data
+from ingest import to_frame
+from sources import current_source
+from tables import paged_table
+from warehouse import MAX_ROWS, QueryResult, query, schemas
+
+EXAMPLES = {
+    "Pods sown per farmer per flood": """
+SELECT f.flood, p.farmer, sum(p.pods) AS pods, count(*) AS sows
+FROM plots p
+JOIN floods f
+  ON p.season BETWEEN f.raining_season AND f.raining_season + f.flood_length
+GROUP BY ALL
+ORDER BY f.flood, pods DESC
+""",
+    "Price, temperature and sows per 100 seasons": """
+SELECT
+  season // 100 * 100 AS seasons,
+  avg(price) AS price,
+  avg(temperature) AS temperature,
+  sum(delta_sown_pinto) AS sown_pinto,
+  sum(delta_number_of_sows) AS sows
+FROM seasons
+GROUP BY ALL
+ORDER BY seasons
+""",
+    "Largest plots": """
+SELECT id, farmer, season, pods, pinto_spent_per_pod, harvest_at
+FROM plots
+ORDER BY pods DESC
+LIMIT 100
+""",
+}
+
+
+@st.cache_data(max_entries=32, show_spinner="Running query..")
+def run_query(version: str, sql: str, _data: Data) -> QueryResult:
+    return query(_data, sql)
+
+
+def main():
+    st.title("🔎 SQL Query")
+
+    if importlib.util.find_spec("duckdb") is None:
+        st.error("Queries need DuckDB, install it with `uv sync --extra sql`.")
+        return
+
+    data = gather_data(current_source())
+
+    with st.expander("Tables"):
+        for name, schema in schemas(data).items():
+            st.markdown(
+                f"**{name}** ・ " + ", ".join(f"`{field.name}`" for field in schema)
+            )
+
+    example = st.selectbox("Example", list(EXAMPLES))
+    sql = st.text_area(
+        "SQL (Ctrl+Enter to run)",
+        EXAMPLES[example].strip(),
+        height=220,
+        key=f"sql_{example}",
+    )
+    if not sql.strip():
+        return
+
+    try:
+        result = run_query(data.version, sql, data)
+    except ValueError as e:
+        st.error(str(e))
+        return
+
+    caption = f"{result.table.num_rows:,} rows in {result.elapsed:.2f}s"
+    if result.truncated:
+        caption += f", only the first {MAX_ROWS:,} are kept"
+    st.caption(caption)
+    paged_table(
+        to_frame(result.table),
+        "query",
+        newest_first=False,
+        hide_index=True,
+        use_container_width=True,
+    )
+
+
+main()
@@ -0,0 +1,160 @@
+"""
+A local, disk-backed cache in front of the subgraphs. Decoded query results are stored as
+ parquet files keyed on a normalized hash of the query, so repeated or overlapping fetch
+ paths (full refreshes, incremental syncs, gap backfills) don't leave the host. Entries
+ that expire are kept apart from immutable ones and swept once expired.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections.abc import Callable, Sequence
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import streamlit as st
+from ingest import to_frame
+
+CACHE_DIR = Path(
+    os.environ.get(
+        "PINTO_CACHE_DIR", Path.home() / ".cache" / "pinto-analysis" / "queries"
+    )
+)
+
+# ttls in seconds, `None` caches forever
+RECENT_TTL = 5 * 60
+ENTITY_TTLS: dict[str, float | None] = {
+    "plots": RECENT_TTL,
+}
+# expiring entries older than every ttl can't be served again
+MAX_TTL = max([RECENT_TTL, *(ttl for ttl in ENTITY_TTLS.values() if ttl is not None)])
+
+# seasonal queries are aligned to blocks of seasons so that overlapping ranges share
+# entries, and every block that ends before the current season never changes again
+SEASON_BLOCK = 1000
+
+
+def season_ttl(end: int, head: int) -> float | None:
+    """Seasons before the current one are immutable, only the open block expires."""
+
+    return None if end <= head else RECENT_TTL
+
+
+def _normalize(value):
+    if isinstance(value, dict):
+        return {
+            key: sorted(v, key=str)
+            if key.endswith("_in") and isinstance(v, list)
+            else _normalize(v)
+            for key, v in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def query_key(endpoint: str, entity: str, args: dict, columns: Sequence[str]) -> str:
+    """A stable hash of a query, independent of argument and column order."""
+
+    normalized = json.dumps(
+        {
+            "endpoint": endpoint.rstrip("/"),
+            "entity": entity,
+            "args": _normalize(args),
+            "columns": sorted(columns),
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+class QueryCache:
+    def __init__(self, directory: Path = CACHE_DIR):
+        self.directory = Path(directory)
+        self.recent = self.directory / "recent"
+        self.recent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._swept = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str, ttl: float | None) -> Path:
+        # an immutable query (a block of closed seasons) never reads an entry written
+        # while its seasons were still open
+        directory = self.directory if ttl is None else self.recent
+        return directory / f"{key}.parquet"
+
+    def get(self, key: str, ttl: float | None) -> pd.DataFrame | None:
+        path = self._path(key, ttl)
+        try:
+            if ttl is not None and time.time() - path.stat().st_mtime > ttl:
+                return None
+            return to_frame(pq.read_table(path))
+        except (FileNotFoundError, pa.ArrowInvalid):
+            return None
+
+    def put(self, key: str, df: pd.DataFrame, ttl: float | None = RECENT_TTL):
+        # write then rename, so concurrent readers never see a partial file
+        path = self._path(key, ttl)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        pq.write_table(pa.Table.from_pandas(df, preserve_index=False), tmp)
+        os.replace(tmp, path)
+        if ttl is not None:
+            self._sweep()
+
+    def _sweep(self):
+        """Removes expired entries, whose keys (watermarks, heads) won't recur."""
+
+        now = time.time()
+        with self._lock:
+            if now - self._swept < MAX_TTL:
+                return
+            self._swept = now
+
+        for path in self.recent.glob("*.parquet"):
+            try:
+                if now - path.stat().st_mtime > MAX_TTL:
+                    path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def fetch(
+        self,
+        endpoint: str,
+        entity: str,
+        args: dict,
+        columns: Sequence[str],
+        fetch: Callable[[], pd.DataFrame],
+        ttl: float | None = RECENT_TTL,
+    ) -> pd.DataFrame:
+        """Returns the cached result of a query, only calling `fetch` on a miss.
+
+        Empty results are never stored, so a query that came back empty is retried.
+        """
+
+        key = query_key(endpoint, entity, args, columns)
+        df = self.get(key, ttl)
+        with self._lock:
+            if df is not None:
+                self.hits += 1
+                return df[list(columns)]
+            self.misses += 1
+
+        df = fetch()
+        if not df.empty:
+            self.put(key, df, ttl)
+        return df
+
+    def clear(self):
+        for path in self.directory.rglob("*.parquet"):
+            path.unlink(missing_ok=True)
+
+
+@st.cache_resource
+def query_cache() -> QueryCache:
+    return QueryCache()
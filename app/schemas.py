@@ -0,0 +1,94 @@
+"""
+Pandera schemas of the frames returned by `gather_data`. They are only imported for type
+ checking, so pandera stays out of the app's startup path.
+"""
+
+import pandas as pd
+import pandera as pa
+from pandera.typing import Series
+
+
+class PintoSchema(pa.DataFrameModel):
+    datetime: Series[pd.DatetimeTZDtype]
+    timestamp: Series[int]
+    season: Series[int]
+    raining: Series[bool]
+    price: Series[float]
+    flood_silo_pinto: Series[float]
+    flood_field_pinto: Series[float]
+    twa_delta_pinto: Series[float]
+    delta_pinto: Series[float]
+    gm_reward: Series[float]
+    twa_minted_pinto: Series[float]
+    market_cap: Series[float]
+    pod_rate: Series[float]
+    temperature: Series[int]
+    pod_index: Series[float]
+    harvestable_index: Series[float]
+    sown_pinto: Series[float]
+    harvested_pods: Series[float]
+    blocks_to_soil_sold_out: Series[int]
+    delta_harvestable_index: Series[float]
+    delta_harvestable_pods: Series[float]
+    delta_harvested_pods: Series[float]
+    delta_issued_soil: Series[float]
+    delta_number_of_sowers: Series[int]
+    delta_number_of_sows: Series[int]
+    delta_pod_index: Series[float]
+    delta_pod_rate: Series[float]
+    delta_real_rate_of_return: Series[float]
+    delta_sown_pinto: Series[float]
+    delta_temperature: Series[int]
+    delta_unharvestable_pods: Series[float]
+    delta_soil: Series[float]
+    cum_number_of_sows: Series[int]
+    cum_issued_soil: Series[float]
+    cum_number_of_sowers: Series[int]
+    harvestable_pods: Series[float]
+    soil_sold_out: Series[bool]
+    soil: Series[float]
+    real_rate_of_return: Series[float]
+    unharvestable_pods: Series[float]
+    cum_pinto_minted: Series[float]
+    active_silo_farmers: Series[int]
+    delta_active_silo_farmers: Series[int]
+    delta_pinto_minted: Series[float]
+    delta_grown_stalk_per_season: Series[float]
+    delta_germinating_stalk: Series[float]
+    delta_deposited_pdv: Series[float]
+    delta_unclaimed_stalk: Series[float]
+    delta_roots: Series[float]
+    delta_stalk: Series[float]
+    deposited_pdv: Series[float]
+    germinating_stalk: Series[float]
+    grown_stalk_per_season: Series[float]
+    unclaimed_stalk: Series[float]
+    roots: Series[float]
+    stalk: Series[float]
+    total_flood_pinto: Series[float]
+    flood_no: Series[int]
+    is_flooding: Series[bool]
+    seasons_since_rain: Series[int] = pa.Field(nullable=True)
+    cum_flood_silo_pinto: Series[float]
+    cum_flood_field_pinto: Series[float]
+    cum_total_flood_pinto: Series[float]
+
+    class Config:
+        dtype_backend = "pyarrow"
+
+
+class PlotsSchema(pa.DataFrameModel):
+    updated_at: Series[int]
+    created_at: Series[int]
+    source: Series[str]
+    season: Series[int]
+    pods: Series[float]
+    index: Series[int]
+    harvestable_pods: Series[float]
+    harvested_pods: Series[float]
+    fully_harvested: Series[bool]
+    beans_per_pod: Series[float]
+    farmer: Series[str]
+
+    class Config:
+        dtype_backend = "pyarrow"
@@ -0,0 +1,124 @@
+"""
+This page calculates analytics related to the silo, where pinto and LP are deposited
+ to earn stalk and seignorage
+"""
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+from charts import plotly_chart
+from data import gather_data
+from millify import millify
+from plotly.subplots import make_subplots
+from silo_store import SiloPrefix, build_silo_prefix, silo_ranges
+from sources import RESIDENT_SNAPSHOTS, current_source
+from utils import M, metrics
+
+DEFAULT_RANGE = 24 * 30  # seasons
+DEFAULT_WINDOW = 24 * 7  # seasons
+
+
+# the prefix sums only change with the snapshot, so they are built once per version
+@st.cache_resource(max_entries=RESIDENT_SNAPSHOTS)
+def silo_prefix(version: str, _df: pd.DataFrame) -> SiloPrefix:
+    return build_silo_prefix(_df)
+
+
+def rolling_figure(rolling: pd.DataFrame, window: int) -> go.Figure:
+    """Seeds per PDV and the silo's pinto per stalk over a rolling window of seasons."""
+
+    fig = make_subplots(
+        rows=2,
+        cols=1,
+        shared_xaxes=True,
+        vertical_spacing=0.08,
+        subplot_titles=(
+            f"Seeds per PDV ({window} seasons)",
+            f"Pinto per Stalk ({window} seasons)",
+        ),
+    )
+    fig.add_trace(
+        go.Scatter(x=rolling["end"], y=rolling["seeds_per_pdv"], name="Seeds per PDV"),
+        row=1,
+        col=1,
+    )
+    fig.add_trace(
+        go.Scatter(
+            x=rolling["end"], y=rolling["minted_pinto_per_stalk"], name="Minted"
+        ),
+        row=2,
+        col=1,
+    )
+    fig.add_trace(
+        go.Scatter(x=rolling["end"], y=rolling["flood_pinto_per_stalk"], name="Flood"),
+        row=2,
+        col=1,
+    )
+    fig.update_xaxes(title_text="Season", row=2, col=1)
+    fig.update_layout(height=600, hovermode="x unified")
+    return fig
+
+
+def main():
+    data = gather_data(current_source())
+    prefix = silo_prefix(data.version, data.df)
+    first, last = int(prefix.seasons[0]), int(prefix.seasons[-1])
+
+    st.header("🏛️ Silo Analytics")
+    # a slider needs a range to slide over
+    start = end = first
+    if first < last:
+        start, end = st.slider(
+            "Seasons",
+            min_value=first,
+            max_value=last,
+            value=(max(first, last - DEFAULT_RANGE), last),
+        )
+    silo = silo_ranges(prefix, start, end).iloc[0]
+
+    metrics(
+        M("Stalk", millify(silo["stalk"], 2)),
+        M("Stalk Growth", f"{silo['stalk_growth']:.2%}"),
+        M("Stalk Growth per Season", f"{silo['stalk_growth_per_season']:.4%}"),
+        M("Roots Growth", f"{silo['roots_growth']:.2%}"),
+        M("Germinating Stalk", millify(silo["germinating_stalk"], 2)),
+    )
+    metrics(
+        M(
+            "Deposited PDV",
+            millify(silo["deposited_pdv"], 2),
+            millify(silo["deposited_pdv_change"], 2),
+        ),
+        M("Active Farmers", millify(silo["active_farmers"])),
+        M("Seeds per PDV", f"{silo['seeds_per_pdv']:.3f}"),
+        M(
+            "Minted Pinto per Stalk",
+            f"{silo['minted_pinto_per_stalk']:.6f}",
+            help=f"{millify(silo['minted_pinto'], 2)} pinto minted to the silo",
+        ),
+        M(
+            "Flood Pinto per Stalk",
+            f"{silo['flood_pinto_per_stalk']:.6f}",
+            help=f"{millify(silo['flood_silo_pinto'], 2)} pinto sold to the silo",
+        ),
+    )
+
+    window = st.number_input(
+        "Rolling Window (seasons)",
+        min_value=1,
+        max_value=max(1, end - start + 1),
+        value=min(DEFAULT_WINDOW, end - start + 1),
+    )
+    # every window of the range in a single pass over the prefix sums
+    ends = np.arange(start + window - 1, end + 1)
+    plotly_chart(
+        data.version,
+        "silo_rolling",
+        lambda: rolling_figure(silo_ranges(prefix, ends - window + 1, ends), window),
+        params=(start, end, window),
+        use_container_width=True,
+    )
+
+
+main()
@@ -0,0 +1,115 @@
+"""
+Silo analytics over arbitrary season ranges. Prefix sums of the silo columns are built
+ once per snapshot, after which the totals and averages of a range are the difference of
+ two cumulative values, and the ends of a range are direct lookups. Every query takes
+ arrays of ranges as well, so rolling windows are computed in a single vectorized pass.
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+# stalk has 10 decimals on-chain but is decoded with 6 like pinto, see `SEASON_DECIMALS`
+STALK_SCALE = 10**4
+STALK_COLUMNS = ["stalk", "germinating_stalk", "grown_stalk_per_season"]
+GROWN_STALK_PER_SEED = 1e-4  # stalk a seed grows every season
+
+SUMMED = [
+    "stalk",
+    "deposited_pdv",
+    "grown_stalk_per_season",
+    "flood_silo_pinto",
+    "delta_pinto_minted",
+]
+LEVELS = ["stalk", "roots", "germinating_stalk", "deposited_pdv", "active_silo_farmers"]
+
+
+class SiloPrefix(NamedTuple):
+    seasons: np.ndarray
+    # `sums[column][i]` is the total of the first `i` seasons
+    sums: dict[str, np.ndarray]
+    levels: dict[str, np.ndarray]
+
+    def rows(self, start, end) -> tuple[np.ndarray, np.ndarray]:
+        """The rows `[lo, hi)` of the seasons from `start` to `end`, inclusive."""
+
+        return (
+            np.searchsorted(self.seasons, start, side="left"),
+            np.searchsorted(self.seasons, end, side="right"),
+        )
+
+
+def build_silo_prefix(df: pd.DataFrame) -> SiloPrefix:
+    def _values(column: str) -> pd.Series:
+        values = df[column].astype(float)
+        return values / STALK_SCALE if column in STALK_COLUMNS else values
+
+    sums = {
+        column: np.concatenate(
+            [[0.0], np.cumsum(_values(column).to_numpy(dtype=float, na_value=0))]
+        )
+        for column in SUMMED
+    }
+    # silo snapshots may be missing for a season, levels keep their last known value
+    levels = {
+        column: _values(column).ffill().to_numpy(dtype=float, na_value=np.nan)
+        for column in LEVELS
+    }
+    return SiloPrefix(df["season"].to_numpy(dtype=np.int64), sums, levels)
+
+
+def silo_ranges(prefix: SiloPrefix, start, end) -> pd.DataFrame:
+    """One row of silo analytics per range of seasons `[start, end]`, which are either
+    both seasons or both arrays of them.
+
+    Growth is measured from the season before the range to its last season.
+    """
+
+    start, end = np.atleast_1d(start), np.atleast_1d(end)
+    lo, hi = prefix.rows(start, end)
+    seasons = hi - lo
+    last_row = len(prefix.seasons) - 1
+
+    def _total(column: str) -> np.ndarray:
+        return prefix.sums[column][hi] - prefix.sums[column][lo]
+
+    def _before(column: str) -> np.ndarray:
+        # a range starting at the first season has no level to grow from
+        before = prefix.levels[column][np.clip(lo - 1, 0, last_row)]
+        return np.where(lo > 0, before, np.nan)
+
+    def _last(column: str) -> np.ndarray:
+        return prefix.levels[column][np.clip(hi - 1, 0, last_row)]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        average_stalk = _total("stalk") / seasons
+        stalk_ratio = _last("stalk") / _before("stalk")
+        ranges = pd.DataFrame(
+            {
+                "start": start,
+                "end": end,
+                "seasons": seasons,
+                "stalk": _last("stalk"),
+                "stalk_growth": stalk_ratio - 1,
+                "stalk_growth_per_season": stalk_ratio ** (1 / seasons) - 1,
+                "roots_growth": _last("roots") / _before("roots") - 1,
+                "germinating_stalk": _last("germinating_stalk"),
+                "grown_stalk": _total("grown_stalk_per_season"),
+                "seeds_per_pdv": _total("grown_stalk_per_season")
+                / _total("deposited_pdv")
+                / GROWN_STALK_PER_SEED,
+                "deposited_pdv": _last("deposited_pdv"),
+                "deposited_pdv_change": _last("deposited_pdv")
+                - _before("deposited_pdv"),
+                "active_farmers": _last("active_silo_farmers"),
+                "flood_silo_pinto": _total("flood_silo_pinto"),
+                "flood_pinto_per_stalk": _total("flood_silo_pinto") / average_stalk,
+                "minted_pinto": _total("delta_pinto_minted"),
+                "minted_pinto_per_stalk": _total("delta_pinto_minted") / average_stalk,
+            }
+        )
+
+    # empty ranges have nothing to report
+    ranges.loc[seasons == 0, "stalk":] = np.nan
+    return ranges
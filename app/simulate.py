@@ -0,0 +1,179 @@
+"""
+Replays the seasonal data under alternative flood parameters. Every scenario is evaluated
+ as a row of a (scenarios x seasons) array, so the grids of the What-if tab replay in
+ process in tens of milliseconds. Much larger grids can be split across the processes of
+ a pool, each replaying a block of scenarios at once.
+"""
+
+import itertools
+from collections.abc import Iterable, Sequence
+from concurrent.futures import Executor
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+# the seasonal columns a replay needs, see `replay_arrays`
+REPLAY_COLUMNS = [
+    "season",
+    "price",
+    "market_cap",
+    "twa_delta_pinto",
+    "pod_rate",
+    "unharvestable_pods",
+]
+
+
+class FloodParameters(NamedTuple):
+    """Rules deciding when it rains and how much is returned once it floods."""
+
+    delta_threshold: float = 0.0  # TWA deltaP must be above this
+    pod_rate_threshold: float = 0.05  # pod rate must be above this
+    field_cap: float = 0.001  # share of the supply returned to the field per season
+
+
+def parameter_grid(
+    delta_thresholds: Iterable[float],
+    pod_rate_thresholds: Iterable[float],
+    field_caps: Iterable[float],
+) -> list[FloodParameters]:
+    """Every combination of the given parameter values."""
+
+    return [
+        FloodParameters(*values)
+        for values in itertools.product(
+            delta_thresholds, pod_rate_thresholds, field_caps
+        )
+    ]
+
+
+def replay_arrays(df: pd.DataFrame) -> dict[str, np.ndarray]:
+    """Extracts the seasonal columns a replay needs as plain float arrays."""
+
+    return {
+        column: df[column].to_numpy(dtype=float, na_value=np.nan)
+        for column in REPLAY_COLUMNS
+    }
+
+
+def _replay(arrays: dict[str, np.ndarray], params: Sequence[FloodParameters]):
+    seasons = arrays["season"]
+    twa_delta = np.nan_to_num(arrays["twa_delta_pinto"])
+    pod_rate = np.nan_to_num(arrays["pod_rate"])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        supply = np.nan_to_num(arrays["market_cap"] / arrays["price"])
+    unharvestable = np.nan_to_num(arrays["unharvestable_pods"])
+
+    delta_threshold, pod_rate_threshold, field_cap = (
+        np.asarray(values, dtype=float)[:, None] for values in zip(*params)
+    )
+
+    # (scenarios x seasons): it rains when both conditions hold, and it floods on every
+    # raining season that follows another raining season
+    raining = (twa_delta > delta_threshold) & (pod_rate > pod_rate_threshold)
+    previous = np.zeros_like(raining)
+    previous[:, 1:] = raining[:, :-1]
+    flooding = raining & previous
+
+    silo = np.where(flooding, np.maximum(twa_delta, 0), 0.0)
+    field = np.where(flooding, np.minimum(unharvestable, field_cap * supply), 0.0)
+
+    # number each raining chunk, and key it by scenario so all scenarios aggregate at once
+    chunk = np.cumsum(raining & ~previous, axis=1)
+    scenario, season = np.nonzero(raining)
+    keys = scenario * (len(seasons) + 1) + chunk[scenario, season]
+    unique, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+
+    def _sum(values: np.ndarray) -> np.ndarray:
+        return np.bincount(inverse, weights=values[scenario, season])
+
+    length = np.bincount(inverse)
+    price = np.broadcast_to(np.nan_to_num(arrays["price"]), raining.shape)
+    floods = pd.DataFrame(
+        {
+            "scenario": unique // (len(seasons) + 1),
+            "raining_season": seasons[season[first]].astype(int),
+            "flood_length": length - 1,
+            "average_price": _sum(price) / length,
+            "flood_silo_pinto": _sum(silo),
+            "flood_field_pinto": _sum(field),
+        }
+    )
+    floods["total_flood_pinto"] = (
+        floods["flood_silo_pinto"] + floods["flood_field_pinto"]
+    )
+
+    # like `calculate_flood_details`, a single raining season is not a flood
+    floods = floods[floods["flood_length"] > 0].reset_index(drop=True)
+    floods.insert(1, "flood", floods.groupby("scenario").cumcount() + 1)
+    return floods
+
+
+def simulate_floods(
+    df: pd.DataFrame | dict[str, np.ndarray], params: Sequence[FloodParameters]
+) -> pd.DataFrame:
+    """Replays the seasons under each set of parameters.
+
+    Returns one long flood table with a row per (scenario, flood), where `scenario`
+     indexes into `params` and the parameters themselves are joined on as columns.
+    """
+
+    arrays = df if isinstance(df, dict) else replay_arrays(df)
+    if not params:
+        return pd.DataFrame(columns=["scenario", "flood", *FloodParameters._fields])
+
+    floods = _replay(arrays, params)
+    parameters = pd.DataFrame(params, columns=FloodParameters._fields)
+    return floods.join(parameters, on="scenario")
+
+
+def _simulate_chunk(
+    arrays: dict[str, np.ndarray], params: Sequence[FloodParameters], offset: int
+) -> pd.DataFrame:
+    floods = simulate_floods(arrays, params)
+    floods["scenario"] += offset
+    return floods
+
+
+def simulate_grid(
+    df: pd.DataFrame,
+    params: Sequence[FloodParameters],
+    pool: Executor | None = None,
+    chunk_size: int = 64,
+) -> pd.DataFrame:
+    """Same as `simulate_floods`, but splits the scenarios across the workers of
+    `pool` when one is given, which is left running for the next grid.
+    """
+
+    arrays = replay_arrays(df)
+    chunks = [
+        (params[start : start + chunk_size], start)
+        for start in range(0, len(params), chunk_size)
+    ]
+    if pool is None or len(chunks) <= 1:
+        return simulate_floods(arrays, params)
+
+    results = pool.map(_simulate_chunk, itertools.repeat(arrays), *zip(*chunks))
+    return pd.concat(list(results), ignore_index=True)
+
+
+def summarize(floods: pd.DataFrame, params: Sequence[FloodParameters]) -> pd.DataFrame:
+    """Aggregates a simulated flood table into one row per scenario of `params`,
+    including the scenarios that never flood.
+    """
+
+    totals = ["flood_silo_pinto", "flood_field_pinto", "total_flood_pinto"]
+    summary = (
+        floods.groupby("scenario")
+        .agg(
+            floods=("flood", "size"),
+            average_flood_length=("flood_length", "mean"),
+            **{column: (column, "sum") for column in totals},
+        )
+        .reindex(range(len(params)))
+    )
+    summary[["floods", *totals]] = summary[["floods", *totals]].fillna(0)
+    summary["floods"] = summary["floods"].astype(int)
+
+    parameters = pd.DataFrame(params, columns=FloodParameters._fields)
+    return pd.concat([parameters, summary.reset_index(drop=True)], axis=1)
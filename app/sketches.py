@@ -0,0 +1,204 @@
+"""
+Mergeable streaming quantile sketches. Values are counted in logarithmically sized bins
+ (DDSketch), so every quantile is within a fixed relative error and two sketches merge by
+ adding their counts. Sketches are kept per time bucket as values arrive, and the
+ quantiles of any window come from merging the buckets it covers instead of sorting the
+ raw values.
+"""
+
+import math
+import sys
+import threading
+from collections import Counter
+from collections.abc import Iterable
+
+import numpy as np
+import pandas as pd
+from data import plot_store
+from sources import Source, resident_stores
+from sync import PlotChanges, seconds
+
+RELATIVE_ACCURACY = 0.01
+HOUR_SECONDS = 60 * 60
+SEASON_BUCKET = 24 * 7  # seasons
+MIN_VALUE = 1e-9  # anything smaller (or negative) is counted as zero
+
+
+class QuantileSketch:
+    def __init__(self, relative_accuracy: float = RELATIVE_ACCURACY):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.bins: Counter[int] = Counter()
+        self.zeros = 0
+        self.count = 0
+        self.sum = 0.0
+
+    def add(self, values: Iterable[float]):
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        positive = values[values > MIN_VALUE]
+
+        keys, counts = np.unique(
+            np.ceil(np.log(positive) / math.log(self.gamma)).astype(np.int64),
+            return_counts=True,
+        )
+        self.bins.update(dict(zip(keys.tolist(), counts.tolist())))
+        self.zeros += len(values) - len(positive)
+        self.count += len(values)
+        self.sum += float(values.sum())
+
+    def merge(self, other: "QuantileSketch"):
+        if other.gamma != self.gamma:
+            raise ValueError("only sketches of the same accuracy can be merged")
+        self.bins.update(other.bins)
+        self.zeros += other.zeros
+        self.count += other.count
+        self.sum += other.sum
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else math.nan
+
+    def quantiles(self, qs: Iterable[float]) -> list[float]:
+        """The values at each quantile `q` in [0, 1], `nan` when empty."""
+
+        qs = list(qs)
+        if not self.count:
+            return [math.nan] * len(qs)
+
+        keys = sorted(self.bins)
+        ranks = np.cumsum([self.zeros, *(self.bins[key] for key in keys)])
+        values = []
+        for q in qs:
+            # the bin holding the value of this rank, 0 being the zero bin
+            position = int(np.searchsorted(ranks, q * (self.count - 1), side="right"))
+            if position == 0:
+                values.append(0.0)
+            else:
+                key = keys[min(position, len(keys)) - 1]
+                values.append(2 * self.gamma**key / (self.gamma + 1))
+        return values
+
+    def quantile(self, q: float) -> float:
+        return self.quantiles([q])[0]
+
+
+class BucketedSketches:
+    """One `QuantileSketch` per bucket of an integer key (a timestamp in seconds, a
+    season), for quantiles over arbitrary windows of it.
+    """
+
+    def __init__(
+        self,
+        bucket_size: int = HOUR_SECONDS,
+        relative_accuracy: float = RELATIVE_ACCURACY,
+    ):
+        self.bucket_size = bucket_size
+        self.relative_accuracy = relative_accuracy
+        self.sketches: dict[int, QuantileSketch] = {}
+        self._lock = threading.Lock()
+
+    def add(self, keys: Iterable[int], values: Iterable[float]):
+        """Adds each value to the bucket of its key."""
+
+        keys = np.asarray(keys, dtype=np.int64)
+        values = np.asarray(values, dtype=float)
+        buckets = keys // self.bucket_size * self.bucket_size
+
+        order = np.argsort(buckets, kind="stable")
+        starts, splits = np.unique(buckets[order], return_index=True)
+        with self._lock:
+            for start, chunk in zip(
+                starts.tolist(), np.split(values[order], splits[1:])
+            ):
+                if start not in self.sketches:
+                    self.sketches[start] = QuantileSketch(self.relative_accuracy)
+                self.sketches[start].add(chunk)
+
+    def window(
+        self, start: int | None = None, end: int | None = None
+    ) -> QuantileSketch:
+        """The merged sketch of the buckets overlapping `[start, end)`."""
+
+        merged = QuantileSketch(self.relative_accuracy)
+        with self._lock:
+            for bucket, sketch in self.sketches.items():
+                if (start is None or bucket + self.bucket_size > start) and (
+                    end is None or bucket < end
+                ):
+                    merged.merge(sketch)
+        return merged
+
+    def memory_usage(self) -> int:
+        return sum(
+            sys.getsizeof(sketch) + sys.getsizeof(sketch.bins)
+            for sketch in self.sketches.values()
+        )
+
+
+def _add_harvested(sketches: BucketedSketches, plots: pd.DataFrame):
+    plots = plots[plots["harvest_at"].notna()]
+    if plots.empty:
+        return
+    durations = (plots["harvest_at"] - plots["created_at"]).dt.total_seconds()
+    sketches.add(seconds(plots["created_at"]), durations.to_numpy(dtype=float))
+
+
+def harvest_time_sketches(source: Source) -> BucketedSketches:
+    """Time from sowing to harvest, bucketed by the hour the plot was sown and updated
+    as plots get harvested.
+    """
+
+    def _create() -> BucketedSketches:
+        sketches = BucketedSketches()
+
+        def _on_changes(changes: PlotChanges):
+            _add_harvested(sketches, changes.inserted)
+            # updated plots only count once, when they first become harvested
+            newly = changes.before["harvest_at"].isna().to_numpy()
+            _add_harvested(sketches, changes.after[newly])
+
+        plot_store(source).subscribe(_on_changes)
+        return sketches
+
+    return resident_stores().get(source.name, "harvest_times", _create)
+
+
+class FloodLengths:
+    """Lengths of closed floods bucketed by their raining season, each flood is added
+    once, when it closes.
+    """
+
+    def __init__(self):
+        self.sketches = BucketedSketches(SEASON_BUCKET)
+        self.closed_through = 0  # raining season of the last closed flood
+        self._lock = threading.Lock()
+
+    def update(self, flood_data: pd.DataFrame, raining: bool):
+        # while it rains the latest flood is still growing
+        closed = flood_data.iloc[:-1] if raining else flood_data
+        with self._lock:
+            new = closed[closed["raining_season"] > self.closed_through]
+            if new.empty:
+                return
+            self.sketches.add(new["raining_season"], new["flood_length"])
+            self.closed_through = int(new["raining_season"].max())
+
+    def memory_usage(self) -> int:
+        return self.sketches.memory_usage()
+
+
+def flood_length_sketch(
+    source: Source, flood_data: pd.DataFrame, raining: bool
+) -> QuantileSketch:
+    """The lengths of every flood, the closed ones from the source's sketches and the
+    ongoing one (if any) added on top.
+    """
+
+    lengths = resident_stores().get(source.name, "flood_lengths", FloodLengths)
+    lengths.update(flood_data, raining)
+
+    sketch = lengths.sketches.window()
+    if raining and not flood_data.empty:
+        sketch.add([flood_data["flood_length"].iloc[-1]])
+    return sketch
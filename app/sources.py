@@ -0,0 +1,126 @@
+"""
+Registry of the deployments (Beanstalk-family protocols or subgraph versions) the app can
+ serve. Every source gets its own snapshot and stores, and only recently viewed sources
+ stay in memory: once the stores of all sources outgrow the memory budget, the least
+ recently used sources are dropped and reloaded on their next view.
+"""
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import NamedTuple, TypeVar
+
+import streamlit as st
+
+T = TypeVar("T")
+
+MEMORY_BUDGET = int(os.environ.get("PINTO_MEMORY_BUDGET", str(1024**3)))  # bytes
+RESIDENT_SNAPSHOTS = 4  # `gather_data` results kept at once
+
+
+class Source(NamedTuple):
+    name: str
+    label: str
+    pintostalk: str
+    exchange: str
+    pinto: str
+    # the diamond, which is also the id of the protocol's silo and field
+    protocol: str
+
+
+DEFAULT_SOURCE = "pinto"
+SOURCES = {
+    DEFAULT_SOURCE: Source(
+        DEFAULT_SOURCE,
+        "Pinto",
+        "https://graph.pinto.money/pintostalk",
+        "https://graph.pinto.money/exchange",
+        # assumed to follow the other two, the baseline only listed the host
+        "https://graph.pinto.money/pinto",
+        "0xD1A0D188E861ed9d15773a2F3574a2e94134bA8f",
+    ),
+}
+
+# other deployments are listed in a json file of `Source` objects
+if path := os.environ.get("PINTO_SOURCES"):
+    with open(path) as f:
+        SOURCES.update((s["name"], Source(**s)) for s in json.load(f))
+
+
+def current_source() -> Source:
+    """The source picked in the sidebar (or through `?source=`), the default otherwise."""
+
+    name = st.session_state.get("source") or st.query_params.get("source")
+    return SOURCES.get(name, SOURCES[DEFAULT_SOURCE])
+
+
+class ResidentStores:
+    """The in-memory stores of every source, kept in least recently used order.
+
+    Stores are created on first use and report their size through `memory_usage()`.
+     Whole sources are evicted past the budget, never the one being accessed. The
+     cached `gather_data` snapshots count towards the budget as well, but are only
+     evicted by their own cache.
+    """
+
+    def __init__(self, budget: int = MEMORY_BUDGET):
+        self.budget = budget
+        self._sources: OrderedDict[str, dict[str, object]] = OrderedDict()
+        # (source, version) -> bytes, in the least recently used order of their cache
+        self._snapshots: OrderedDict[tuple[str, str], int] = OrderedDict()
+        # stores may look up other stores of their source while being created
+        self._lock = threading.RLock()
+
+    def get(self, source: str, kind: str, create: Callable[[], T]) -> T:
+        with self._lock:
+            stores = self._sources.setdefault(source, {})
+            self._sources.move_to_end(source)
+            if kind not in stores:
+                stores[kind] = create()
+
+            # stores only grow while syncing, so the budget is enforced lazily here
+            self._evict()
+            return stores[kind]
+
+    def snapshot(self, source: str, version: str, size: Callable[[], int]):
+        """Accounts for a snapshot served from the `gather_data` cache, which keeps
+        the last `RESIDENT_SNAPSHOTS` used. `size` is only measured once per version.
+        """
+
+        with self._lock:
+            key = (source, version)
+            if key not in self._snapshots:
+                self._snapshots[key] = size()
+            self._snapshots.move_to_end(key)
+            while len(self._snapshots) > RESIDENT_SNAPSHOTS:
+                self._snapshots.popitem(last=False)
+            self._evict()
+
+    def _evict(self):
+        while len(self._sources) > 1 and self.memory_usage() > self.budget:
+            self._sources.popitem(last=False)
+
+    def memory_usage(self, source: str | None = None) -> int:
+        sources = self._sources if source is None else [source]
+        stores = sum(
+            store.memory_usage()
+            for name in sources
+            for store in self._sources.get(name, {}).values()
+        )
+        snapshots = sum(
+            size
+            for (name, _), size in self._snapshots.items()
+            if source is None or name == source
+        )
+        return stores + snapshots
+
+    @property
+    def resident(self) -> list[str]:
+        return list(self._sources)
+
+
+@st.cache_resource
+def resident_stores() -> ResidentStores:
+    return ResidentStores()
@@ -0,0 +1,129 @@
+"""
+Change data capture for plots. Plots keep changing after they are sown as the pod line
+ moves, so after the first full download only the plots updated since the last sync
+ watermark are queried and upserted by `id` into the existing frame.
+"""
+
+import threading
+from collections.abc import Callable
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+
+class PlotChanges(NamedTuple):
+    inserted: pd.DataFrame
+    before: pd.DataFrame  # previous version of the updated plots
+    after: pd.DataFrame
+
+
+def watermark(plots: pd.DataFrame) -> int:
+    """The latest `updated_at` of the frame, in seconds."""
+
+    if plots.empty:
+        return 0
+    return int(plots["updated_at"].max().timestamp())
+
+
+def seconds(datetimes: pd.Series) -> np.ndarray:
+    """Datetimes as integer seconds."""
+
+    return datetimes.astype("datetime64[s]").astype(np.int64).to_numpy()
+
+
+def upsert_plots(
+    plots: pd.DataFrame, changed: pd.DataFrame
+) -> tuple[pd.DataFrame, PlotChanges]:
+    """Upserts `changed` by `id` into `plots`, which is kept sorted by `index`.
+
+    Updated plots are patched in place. New plots are appended when they extend the pod
+     line, which is always the case for sows, and only merged back into sorted position
+     otherwise.
+    """
+
+    # pages may return several versions of a plot, in any order
+    changed = changed.sort_values("updated_at", kind="stable")
+    changed = changed.drop_duplicates("id", keep="last")
+    positions = pd.Index(plots["id"]).get_indexer(changed["id"])
+    existing = positions >= 0
+
+    # patch updated plots in place, keeping their previous version around
+    updated = changed[existing]
+    rows = positions[existing]
+    before = plots.iloc[rows].copy()
+    if len(rows):
+        for column in changed.columns:
+            plots.iloc[rows, plots.columns.get_loc(column)] = updated[column].to_numpy()
+
+    inserted = changed[~existing].sort_values("index", ignore_index=True)
+    if not inserted.empty:
+        appends = plots.empty or inserted["index"].iloc[0] > plots["index"].iloc[-1]
+        plots = pd.concat([plots, inserted], ignore_index=True)
+        if not appends:
+            plots = plots.sort_values("index", kind="stable", ignore_index=True)
+
+    return plots, PlotChanges(inserted, before, updated.reset_index(drop=True))
+
+
+class PlotStore:
+    """Holds the synced plots frame across data refreshes.
+
+    Derived per-farmer state can `subscribe` to receive the `PlotChanges` of each sync,
+     the very first sync (or subscribing after it) reports every plot as inserted.
+    """
+
+    def __init__(self):
+        self.plots: pd.DataFrame | None = None
+        self._lock = threading.Lock()
+        self._subscribers: list[Callable[[PlotChanges], None]] = []
+
+    def subscribe(self, callback: Callable[[PlotChanges], None]):
+        with self._lock:
+            if self.plots is not None:
+                callback(
+                    PlotChanges(self.plots, self.plots.iloc[:0], self.plots.iloc[:0])
+                )
+            # only kept once the replay went through, so a failing subscriber (and the
+            # store it was building) doesn't linger and break every later sync
+            self._subscribers.append(callback)
+
+    def seed(self, plots: pd.DataFrame):
+        """Loads an already synced frame into a store that has none, e.g. one recreated
+        after eviction while the snapshot holding its plots is still cached.
+        """
+
+        with self._lock:
+            if self.plots is not None:
+                return
+            self.plots = plots.copy()
+            changes = PlotChanges(self.plots, self.plots.iloc[:0], self.plots.iloc[:0])
+            for callback in self._subscribers:
+                callback(changes)
+
+    def memory_usage(self) -> int:
+        if self.plots is None:
+            return 0
+        return int(self.plots.memory_usage(deep=True).sum())
+
+    def sync(
+        self,
+        fetch_all: Callable[[], pd.DataFrame],
+        fetch_since: Callable[[int], pd.DataFrame],
+    ) -> pd.DataFrame:
+        """Syncs the plots and returns the store's own frame, which later syncs patch in
+        place, so callers holding on to it past the next sync copy it.
+        """
+
+        with self._lock:
+            if self.plots is None:
+                plots = fetch_all().sort_values("index", ignore_index=True)
+                changes = PlotChanges(plots, plots.iloc[:0], plots.iloc[:0])
+                self.plots = plots
+            else:
+                changed = fetch_since(watermark(self.plots))
+                self.plots, changes = upsert_plots(self.plots, changed)
+
+            for callback in self._subscribers:
+                callback(changes)
+            return self.plots
@@ -0,0 +1,59 @@
+"""
+Paged tables. Frames are sent one page at a time with their numeric columns untouched,
+ formatting is declared through `column_config` and applied by the browser, so the work
+ and payload of a table are bounded by the page size instead of the history.
+"""
+
+import math
+
+import pandas as pd
+import streamlit as st
+
+PAGE_SIZE = 50
+
+
+def number(
+    label: str, format: str | None = None, step: float = 0.1
+) -> st.column_config.NumberColumn:
+    """Without a printf `format`, numbers are shown with thousands separators and the
+    decimals of `step`, e.g. `12,345.6`.
+    """
+
+    return st.column_config.NumberColumn(label, format=format, step=step)
+
+
+@st.fragment
+def paged_table(
+    df: pd.DataFrame,
+    key: str,
+    column_config: dict | None = None,
+    page_size: int = PAGE_SIZE,
+    newest_first: bool = True,
+    **kwargs,
+):
+    """Shows one page of `df`, paging through it only reruns the table itself.
+
+    With `newest_first` pages run from the end of the frame and only the rows on the page
+     are reversed.
+    """
+
+    rows = len(df)
+    pages = max(1, math.ceil(rows / page_size))
+    page = 1
+    if pages > 1:
+        page = st.number_input(
+            f"Page (of {pages})", min_value=1, max_value=pages, key=f"{key}_page"
+        )
+
+    if newest_first:
+        stop = rows - (page - 1) * page_size
+        start = max(0, stop - page_size)
+        shown = df.iloc[start:stop].iloc[::-1]
+    else:
+        start = (page - 1) * page_size
+        stop = min(rows, start + page_size)
+        shown = df.iloc[start:stop]
+
+    st.dataframe(shown, column_config=column_config, **kwargs)
+    if pages > 1:
+        st.caption(f"{len(shown)} of {rows} rows")
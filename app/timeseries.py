@@ -0,0 +1,233 @@
+"""
+Price and deltaP time series. The subgraph only has hourly snapshots, so history is one
+ row per season, the updates observed while polling are kept as well but are only as
+ frequent as the app is viewed. Rows are stored as compressed parquet parts (delta
+ encoded timestamps, byte-stream-split floats) that support range queries and resampling
+ without loading the full history.
+"""
+
+import os
+import threading
+import time
+from collections.abc import Callable, Iterable
+from functools import partial
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+import streamlit as st
+from data import ALL
+from httpx import HTTPError
+from ingest import collect, stream_pages
+from sources import Source, current_source
+from subgrounds import FieldPath, Subgrounds
+from subgrounds.errors import SubgroundsError
+
+TIMESERIES_DIR = Path(
+    os.environ.get(
+        "PINTO_TIMESERIES_DIR",
+        Path.home() / ".cache" / "pinto-analysis" / "timeseries",
+    )
+)
+SYNC_INTERVAL = 60  # seconds
+MAX_PARTS = 32  # parts are merged back into one past this
+
+
+def price_columns(snapshots: FieldPath) -> list[tuple[FieldPath, str]]:
+    return [
+        (snapshots.lastUpdateTimestamp, "timestamp"),
+        (snapshots.lastUpdateBlockNumber, "block"),
+        (snapshots.season.season, "season"),
+        (snapshots.instPrice, "price"),
+        (snapshots.twaPrice, "twa_price"),
+        (snapshots.twaDeltaB, "twa_delta_pinto"),
+    ]
+
+
+class TimeSeriesStore:
+    """An append-only, timestamp sorted series stored as parquet parts, optionally
+    kept up to date by a `source` that appends whatever is new.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        source: Callable[["TimeSeriesStore"], None] | None = None,
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.source = source
+        self.synced_at = 0.0
+        self._lock = threading.Lock()
+
+    def sync(self, force: bool = False):
+        if self.source is None:
+            return
+        if force or time.time() - self.synced_at >= SYNC_INTERVAL:
+            self.synced_at = time.time()
+            self.source(self)
+
+    def _parts(self) -> list[Path]:
+        return sorted(self.directory.glob("part-*.parquet"))
+
+    @property
+    def latest(self) -> int:
+        """The latest stored timestamp, part names are `part-{start}-{end}.parquet`."""
+
+        parts = self._parts()
+        return int(parts[-1].stem.split("-")[2]) if parts else 0
+
+    def _write(self, tables: Iterable[pa.Table], schema: pa.Schema, path: Path):
+        floats = [field.name for field in schema if pa.types.is_floating(field.type)]
+        tmp = path.with_suffix(".tmp")
+        with pq.ParquetWriter(
+            tmp,
+            schema,
+            compression="zstd",
+            use_dictionary=False,
+            column_encoding={
+                "timestamp": "DELTA_BINARY_PACKED",
+                **{column: "BYTE_STREAM_SPLIT" for column in floats},
+            },
+        ) as writer:
+            for table in tables:
+                writer.write_table(table)
+        os.replace(tmp, path)
+
+    def append(self, df: pd.DataFrame):
+        """Appends rows newer than the latest stored timestamp."""
+
+        with self._lock:
+            df = df[df["timestamp"] > self.latest].sort_values("timestamp")
+            if df.empty:
+                return
+
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            start, end = int(df["timestamp"].iloc[0]), int(df["timestamp"].iloc[-1])
+            path = self.directory / f"part-{start:012d}-{end:012d}.parquet"
+            self._write([table], table.schema, path)
+
+            if len(self._parts()) > MAX_PARTS:
+                self._compact()
+
+    def _compact(self):
+        # parts are streamed into the merged file one at a time, conformed to a schema
+        # every part fits (a column may be missing or null typed in some of them)
+        parts = self._parts()
+        start, end = parts[0].stem.split("-")[1], parts[-1].stem.split("-")[2]
+        merged = self.directory / f"part-{start}-{end}.parquet"
+        schema = pa.unify_schemas(
+            [pq.read_schema(part) for part in parts], promote_options="permissive"
+        )
+        self._write(
+            (_conform(pq.read_table(part), schema) for part in parts),
+            schema,
+            merged,
+        )
+        for part in parts:
+            if part != merged:
+                part.unlink()
+
+    def range(
+        self, start: int, end: int, columns: list[str] | None = None
+    ) -> pd.DataFrame:
+        """Rows with `start <= timestamp < end`. Only the overlapping parts are opened,
+        and their row group statistics skip everything else.
+        """
+
+        parts = [
+            part
+            for part in self._parts()
+            if int(part.stem.split("-")[1]) < end
+            and int(part.stem.split("-")[2]) >= start
+        ]
+        if not parts:
+            return pd.DataFrame(columns=columns)
+
+        table = ds.dataset(parts, format="parquet").to_table(
+            columns=columns and ["timestamp", *columns],
+            filter=(ds.field("timestamp") >= start) & (ds.field("timestamp") < end),
+        )
+        df = table.to_pandas().sort_values("timestamp", ignore_index=True)
+        df["datetime"] = pd.to_datetime(df["timestamp"], unit="s")
+        return df
+
+    def resample(
+        self,
+        start: int,
+        end: int,
+        freq: str,
+        columns: list[str] | None = None,
+        how: str = "last",
+    ) -> pd.DataFrame:
+        """The range aggregated into `freq` buckets, e.g. `"5min"`."""
+
+        df = self.range(start, end, columns)
+        if df.empty:
+            return df
+        return (
+            df.drop(columns="timestamp")
+            .set_index("datetime")
+            .resample(freq)
+            .agg(how)
+            .dropna(how="all")
+            .reset_index()
+        )
+
+
+def _conform(table: pa.Table, schema: pa.Schema) -> pa.Table:
+    return pa.Table.from_arrays(
+        [
+            table[field.name].cast(field.type)
+            if field.name in table.column_names
+            else pa.nulls(table.num_rows, field.type)
+            for field in schema
+        ],
+        schema=schema,
+    )
+
+
+def sync_prices(source: Source, store: TimeSeriesStore):
+    """Fetches every snapshot update after the latest stored one."""
+
+    with Subgrounds() as sg:
+        pinto = sg.load_subgraph(source.pinto)
+        snapshots = pinto.Query.beanHourlySnapshots(
+            first=ALL,
+            orderBy="lastUpdateTimestamp",
+            orderDirection="asc",
+            where={"lastUpdateTimestamp_gt": store.latest},
+        )
+        fpaths, columns = zip(*price_columns(snapshots))
+        store.append(
+            collect(
+                stream_pages(sg, fpaths, columns),
+                columns,
+                decimals=["twa_delta_pinto"],
+            )
+        )
+
+
+# the series live on disk, so keeping one store object per source costs nothing
+@st.cache_resource
+def price_series(source: Source) -> TimeSeriesStore:
+    return TimeSeriesStore(
+        TIMESERIES_DIR / source.name / "price", partial(sync_prices, source)
+    )
+
+
+def price_data(source: Source | None = None) -> TimeSeriesStore:
+    """The shared price series of a source (the current one by default), synced at most
+    once per `SYNC_INTERVAL`.
+    """
+
+    store = price_series(source or current_source())
+    try:
+        store.sync()
+    # while the subgraph can't be reached the stored series is served, and the sync is
+    # retried after the interval
+    except (OSError, HTTPError, SubgroundsError):
+        pass
+    return store
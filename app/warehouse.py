@@ -0,0 +1,168 @@
+"""
+Embedded SQL over the current snapshot. The season (with its field and silo snapshots),
+ flood and plot frames are exported once per snapshot version as parquet files with small
+ row groups, and queried in process with DuckDB, which only reads the columns and row
+ groups a query touches, runs on a few cores and spills to disk past its memory limit, so
+ ad-hoc questions never load the frames into pandas. Only single `SELECT` statements are
+ run, and each is interrupted past a time limit.
+
+DuckDB is optional, install it with `uv sync --extra sql`.
+"""
+
+import os
+import shutil
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import NamedTuple
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import streamlit as st
+from api import DATASETS
+from data import Data
+from sources import MEMORY_BUDGET, RESIDENT_SNAPSHOTS
+
+WAREHOUSE_DIR = Path(
+    os.environ.get(
+        "PINTO_WAREHOUSE_DIR", Path.home() / ".cache" / "pinto-analysis" / "warehouse"
+    )
+)
+ROW_GROUP_SIZE = 16 * 1024  # rows, the unit row group statistics can skip
+MAX_ROWS = 10_000  # rows of a result returned to a page
+TIMEOUT = 30  # seconds a query may run
+# queries share the process with every session's reruns
+THREADS = min(4, os.cpu_count() or 1)
+TABLES = list(DATASETS)
+
+# exports being read by a query, which are never pruned
+_reading: Counter[Path] = Counter()
+_lock = threading.Lock()
+
+
+class QueryResult(NamedTuple):
+    table: pa.Table
+    truncated: bool  # more than `max_rows` rows matched
+    elapsed: float  # seconds
+
+
+def export(data: Data) -> Path:
+    """The directory of the snapshot's tables, written once per version."""
+
+    directory = WAREHOUSE_DIR / data.source.name / data.version
+    if not directory.exists():
+        _write(data, directory)
+
+    # the most recently used versions are kept, which covers the resident snapshots
+    os.utime(directory)
+    with _lock:
+        versions = sorted(
+            (
+                path
+                for path in directory.parent.iterdir()
+                if not path.name.startswith(".") and not _reading[path]
+            ),
+            key=lambda path: path.stat().st_mtime,
+        )
+        for old in versions[:-RESIDENT_SNAPSHOTS]:
+            shutil.rmtree(old, ignore_errors=True)
+    return directory
+
+
+def _write(data: Data, directory: Path):
+    # written aside then renamed, so queries never see a partial export
+    tmp = directory.with_name(f".{data.version}.{os.getpid()}.tmp")
+    tmp.mkdir(parents=True, exist_ok=True)
+    for name, dataset in DATASETS.items():
+        pq.write_table(
+            pa.Table.from_pandas(dataset.frame(data), preserve_index=False),
+            tmp / f"{name}.parquet",
+            row_group_size=ROW_GROUP_SIZE,
+            compression="zstd",
+        )
+    try:
+        os.replace(tmp, directory)
+    except OSError:
+        # another session exported the same version first
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def schemas(data: Data) -> dict[str, pa.Schema]:
+    directory = export(data)
+    return {name: pq.read_schema(directory / f"{name}.parquet") for name in TABLES}
+
+
+@st.cache_resource
+def connection():
+    """A process wide in-memory database, every query gets its own cursor.
+
+    Queries may only read the exports, and can't change that setting.
+    """
+
+    import duckdb
+
+    WAREHOUSE_DIR.mkdir(parents=True, exist_ok=True)
+    con = duckdb.connect(
+        config={
+            "threads": THREADS,
+            "memory_limit": f"{MEMORY_BUDGET // 1024**2}MB",
+            "temp_directory": str(WAREHOUSE_DIR / ".spill"),
+        }
+    )
+    con.execute(f"SET allowed_directories = ['{WAREHOUSE_DIR}']")
+    con.execute("SET enable_external_access = false")
+    con.execute("SET lock_configuration = true")
+    return con
+
+
+def query(
+    data: Data, sql: str, max_rows: int = MAX_ROWS, timeout: float = TIMEOUT
+) -> QueryResult:
+    """Runs `sql` over the `seasons`, `floods` and `plots` views of the snapshot.
+
+    Results are streamed in batches and only the first `max_rows` rows are kept.
+    """
+
+    import duckdb
+
+    directory = WAREHOUSE_DIR / data.source.name / data.version
+    with _lock:
+        _reading[directory] += 1
+    cursor = connection().cursor()
+    timer = threading.Timer(timeout, cursor.interrupt)
+    timer.daemon = True
+    try:
+        # anything else could write into the exports, e.g. `COPY ... TO`
+        statements = cursor.extract_statements(sql)
+        if len(statements) != 1 or statements[0].type != duckdb.StatementType.SELECT:
+            raise ValueError("Only a single SELECT statement can be run.")
+
+        export(data)
+        # temporary views only exist on this cursor
+        for name in TABLES:
+            cursor.execute(
+                f"CREATE TEMP VIEW {name} AS "
+                f"SELECT * FROM read_parquet('{directory / name}.parquet')"
+            )
+
+        start = time.perf_counter()
+        timer.start()
+        reader = cursor.execute(sql).fetch_record_batch()
+        batches, rows = [], 0
+        for batch in reader:
+            batches.append(batch)
+            rows += batch.num_rows
+            if rows > max_rows:
+                break
+        table = pa.Table.from_batches(batches, reader.schema).slice(0, max_rows)
+        return QueryResult(table, rows > max_rows, time.perf_counter() - start)
+    except duckdb.InterruptException as e:
+        raise ValueError(f"The query was stopped after {timeout}s.") from e
+    except duckdb.Error as e:
+        raise ValueError(str(e)) from e
+    finally:
+        timer.cancel()
+        cursor.close()
+        with _lock:
+            _reading[directory] -= 1
@@ -0,0 +1,32 @@
+import threading
+import urllib.error
+import urllib.request
+from http import HTTPStatus
+from http.server import ThreadingHTTPServer
+
+import api
+import httpx
+import pytest
+from api import SnapshotHandler, etag_matches
+
+
+def test_etag_matches_whole_tags():
+    assert etag_matches('"abc", W/"def"', '"def"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches('"abcd"', '"abc"')
+    assert not etag_matches("", '"abc"')
+
+
+def test_unreachable_subgraph_is_a_bad_gateway(monkeypatch):
+    def _gather_data(source):
+        raise httpx.ConnectError("unreachable")
+
+    monkeypatch.setattr(api, "gather_data", _gather_data)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SnapshotHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        with pytest.raises(urllib.error.HTTPError) as e:
+            urllib.request.urlopen(f"http://127.0.0.1:{server.server_port}/seasons")
+        assert e.value.code == HTTPStatus.BAD_GATEWAY
+    finally:
+        server.shutdown()
@@ -0,0 +1,50 @@
+import exchange
+import httpx
+import pandas as pd
+import pyarrow as pa
+from exchange import STRINGS, ExchangeStore
+from ingest import collect
+from sources import DEFAULT_SOURCE, SOURCES
+
+
+def liquidity_page() -> pd.DataFrame:
+    # as returned by the subgraph, every value is a string
+    return pd.DataFrame(
+        {
+            "id": ["0xa-1", "0xb-1", "0xa-2"],
+            "well": ["0xa", "0xb", "0xa"],
+            "timestamp": ["3600", "3600", "7200"],
+            "liquidity_usd": ["100.5", "200", "150"],
+            "delta_volume_usd": ["10", "20", "5"],
+        }
+    )
+
+
+def test_hourly_sums_the_liquidity_of_decoded_wells():
+    page = liquidity_page()
+    decoded = collect([page], list(page.columns), strings=STRINGS)
+    store = ExchangeStore(SOURCES[DEFAULT_SOURCE])
+    store.liquidity = pa.Table.from_pandas(decoded, preserve_index=False)
+
+    hourly = store.hourly()
+
+    assert decoded["well"].tolist() == ["0xa", "0xb", "0xa"]
+    # the second hour carries the last liquidity of the well without a snapshot
+    assert hourly["liquidity_usd"].tolist() == [300.5, 350.0]
+    assert hourly["volume_usd"].tolist() == [30.0, 5.0]
+
+
+def test_failed_sync_serves_the_last_tables(monkeypatch):
+    store = exchange.exchange_store(SOURCES[DEFAULT_SOURCE])
+    page = liquidity_page()
+    liquidity = pa.Table.from_pandas(
+        collect([page], list(page.columns), strings=STRINGS), preserve_index=False
+    )
+    store.liquidity = liquidity
+
+    def _load_subgraph(self, url):
+        raise httpx.ConnectError("unreachable")
+
+    monkeypatch.setattr(exchange.Subgrounds, "load_subgraph", _load_subgraph)
+    assert exchange.exchange_data(SOURCES[DEFAULT_SOURCE]) is store
+    assert store.liquidity is liquidity
@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+from flood_store import build_flood_seasons, calculate_flood_details, flood_state
+
+
+def seasons() -> pd.DataFrame:
+    # a single raining season (not a flood), a 3 season flood and one still going
+    raining = [0, 1, 0, 1, 1, 1, 0, 0, 1, 1]
+    n = len(raining)
+    return pd.DataFrame(
+        {
+            "season": np.arange(1, n + 1),
+            "timestamp": np.arange(n) * 3600,
+            "raining": raining,
+            "price": np.linspace(1.0, 1.09, n),
+            "pod_rate": 0.1,
+            "flood_silo_pinto": [0, 0, 0, 0, 5, 7, 0, 0, 0, 3],
+            "flood_field_pinto": [0, 0, 0, 0, 1, 2, 0, 0, 0, 4],
+            "twa_delta_pinto": np.arange(n) * 10.0,
+            "twa_minted_pinto": np.arange(n) * 2.0,
+            "gm_reward": 1.0,
+            "delta_pinto": np.arange(n) * 3.0,
+        }
+    ).astype({"flood_silo_pinto": float, "flood_field_pinto": float})
+
+
+def grouped_floods(df: pd.DataFrame) -> pd.DataFrame:
+    """The groupby `calculate_flood_details` used before `flood_state` existed."""
+
+    df = df.copy()
+    df["total_flood_pinto"] = df["flood_silo_pinto"] + df["flood_field_pinto"]
+    df["flood_no"] = (df["raining"] != df["raining"].shift()).cumsum()
+    return df
+
+
+def test_flood_details_match_the_grouped_floods():
+    df = flood_state(seasons())
+    expected = calculate_flood_details(grouped_floods(seasons()))
+
+    floods = calculate_flood_details(df)
+
+    pd.testing.assert_frame_equal(floods, expected)
+    assert floods["raining_season"].tolist() == [4, 9]
+    assert floods["flood_length"].tolist() == [2, 1]
+    assert floods["total_flood_pinto"].tolist() == [15.0, 7.0]
+
+
+def test_flood_state_matches_the_grouped_floods():
+    df = flood_state(seasons())
+    grouped = grouped_floods(seasons())
+    chunks = grouped.groupby("flood_no")
+
+    assert df["flood_no"].tolist() == grouped["flood_no"].tolist()
+    raining = grouped["raining"].eq(1)
+    assert df["is_flooding"].tolist() == (raining & chunks.cumcount().gt(0)).tolist()
+    for column, cumulative in [
+        ("flood_silo_pinto", "cum_flood_silo_pinto"),
+        ("total_flood_pinto", "cum_total_flood_pinto"),
+    ]:
+        sums = grouped[column].where(raining, 0).groupby(grouped["flood_no"]).cumsum()
+        assert df[cumulative].tolist() == sums.tolist()
+    np.testing.assert_array_equal(
+        df["seasons_since_rain"], [np.nan, 0, 1, 0, 0, 0, 1, 2, 0, 0]
+    )
+
+
+def test_flood_seasons_hold_the_rows_of_every_flood():
+    df = flood_state(seasons())
+    calculate_flood_details(df)
+    grouped = grouped_floods(seasons())
+    chunks = [
+        chunk.reset_index(drop=True)
+        for _, chunk in grouped[grouped["raining"].eq(1)].groupby("flood_no")
+        if len(chunk) > 1
+    ]
+
+    store = build_flood_seasons(df)
+
+    assert store.floods == len(chunks) == 2
+    for flood, chunk in enumerate(chunks):
+        frame = store.frame(flood)
+        assert frame["season"].tolist() == chunk["season"].tolist()
+        np.testing.assert_allclose(frame["price"], chunk["price"])
+        assert store.sum(flood, "total_flood_pinto") == chunk["total_flood_pinto"].sum()
+        assert store.sum(flood, "flood_silo_pinto", [0, -1]) == (
+            chunk["flood_silo_pinto"].iloc[[0, -1]].sum()
+        )
+        np.testing.assert_allclose(
+            store.take(flood, ["season", "price"], [-1]),
+            chunk[["season", "price"]].iloc[[-1]].to_numpy(),
+        )
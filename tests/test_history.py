@@ -0,0 +1,44 @@
+import pandas as pd
+from history import SnapshotHistory
+
+
+def seasons() -> pd.DataFrame:
+    return pd.DataFrame({"season": [1, 2], "price": [1.0, 1.1]})
+
+
+def plots(updated_at: list[int]) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "id": ["a", "b"],
+            "index": [0.0, 10.0],
+            "updated_at": pd.to_datetime(updated_at, unit="s"),
+        }
+    )
+
+
+def test_writers_of_the_same_source_append_to_one_manifest(tmp_path):
+    # e.g. the app and the standalone API
+    app, api = SnapshotHistory(tmp_path), SnapshotHistory(tmp_path)
+
+    app.record("v1", seasons(), plots([100, 200]))
+    api.record("v2", seasons(), plots([100, 300]))
+    app.record("v2", seasons(), plots([100, 300]))
+
+    assert [v.version for v in SnapshotHistory(tmp_path).versions] == ["v1", "v2"]
+    # the second writer only stored the plot that changed since the first's version
+    assert len(pd.read_parquet(tmp_path / "plots" / api.versions[1].plots)) == 1
+    assert app.as_of(2).plots["updated_at"].max() == pd.Timestamp(300, unit="s")
+
+
+def test_versions_only_rewrite_the_tail_of_the_open_block(tmp_path):
+    history = SnapshotHistory(tmp_path)
+    df = pd.DataFrame({"season": range(1, 1100), "price": 1.0})
+
+    first = history.record("v1", df.iloc[:-1], plots([100, 200]))
+    second = history.record("v2", df, plots([100, 200]))
+
+    # the closed block and the full chunks of the open one are shared
+    assert first.chunks[:-1] == second.chunks[:-1]
+    assert len(pd.read_parquet(tmp_path / "seasons" / second.chunks[-1])) == 25
+    assert history.as_of(1099).df["season"].tolist() == list(range(1, 1100))
+    assert history.as_of(1098).df["season"].tolist() == list(range(1, 1099))
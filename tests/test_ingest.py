@@ -0,0 +1,54 @@
+import pandas as pd
+from ingest import SnapshotGaps, reconcile_snapshots
+
+
+def snapshots(seasons: list[int], updated_at: list[int]) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "field_season": seasons,
+            "field_updated_at": updated_at,
+            "pods": [float(t) for t in updated_at],
+        }
+    )
+
+
+def no_backfill(seasons: list[int]) -> pd.DataFrame:
+    raise AssertionError(f"unexpected backfill of {seasons}")
+
+
+def reconcile(df: pd.DataFrame, seasons: list[int], backfill=no_backfill):
+    return reconcile_snapshots(
+        df, pd.Series(seasons), "field_season", "field_updated_at", backfill
+    )
+
+
+def test_duplicated_snapshots_keep_the_latest_update():
+    df, gaps = reconcile(snapshots([1, 2, 2, 3], [10, 20, 25, 30]), [1, 2, 3])
+
+    assert df["field_season"].tolist() == [1, 2, 3]
+    assert df["pods"].tolist() == [10.0, 25.0, 30.0]
+    assert "field_updated_at" not in df
+    assert gaps == SnapshotGaps([], [])
+
+
+def test_missing_seasons_are_backfilled():
+    requested = []
+
+    def _backfill(seasons: list[int]) -> pd.DataFrame:
+        requested.append(seasons)
+        return snapshots([2], [20])
+
+    df, gaps = reconcile(snapshots([1, 3], [10, 30]), [1, 2, 3, 4], _backfill)
+
+    # only the missing seasons are queried again, and 4 is still missing
+    assert requested == [[2, 4]]
+    assert df["field_season"].tolist() == [1, 2, 3]
+    assert gaps == SnapshotGaps([2, 4], [4])
+
+
+def test_snapshots_arriving_out_of_order():
+    df, gaps = reconcile(snapshots([3, 1, 2, 1], [30, 12, 20, 10]), [1, 2, 3])
+
+    assert df["field_season"].tolist() == [1, 2, 3]
+    assert df["pods"].tolist() == [12.0, 20.0, 30.0]
+    assert gaps == SnapshotGaps([], [])
@@ -0,0 +1,96 @@
+import httpx
+import pagination
+import pandas as pd
+import pytest
+from pagination import Cursor, PageSizer, cursor_where, iter_cursor_pages
+
+
+def rows() -> pd.DataFrame:
+    # several rows share a `created_at` across every page boundary
+    return pd.DataFrame(
+        {
+            "created_at": [50, 50, 50, 40, 40, 40, 40, 30, 20, 20, 20, 10],
+            "id": [f"{i:02}" for i in range(12)],
+        }
+    ).sort_values(["created_at", "id"], ascending=False, ignore_index=True)
+
+
+def matches(row: pd.Series, where: dict) -> bool:
+    """Evaluates the filters `cursor_where` builds against a single row."""
+
+    def _match(key: str, value) -> bool:
+        if key == "and":
+            return all(matches(row, clause) for clause in value)
+        if key == "or":
+            return any(matches(row, clause) for clause in value)
+        if key.endswith("_lt"):
+            return row[key[:-3]] < value
+        if key.endswith("_gt"):
+            return row[key[:-3]] > value
+        return row[key] == value
+
+    return all(_match(key, value) for key, value in where.items())
+
+
+def fake_fetch(df: pd.DataFrame, fail: int = 0):
+    calls = []
+
+    def _fetch(cursor: Cursor | None, first: int) -> pd.DataFrame:
+        calls.append(first)
+        if len(calls) <= fail:
+            raise httpx.ConnectError("down")
+        where = cursor_where({}, cursor, "created_at", "desc")
+        after = df[[matches(row, where) for _, row in df.iterrows()]]
+        return after.head(first).reset_index(drop=True)
+
+    return _fetch, calls
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    monkeypatch.setattr(pagination.time, "sleep", lambda seconds: None)
+
+
+def test_cursor_ties_are_paged_without_skips_or_duplicates():
+    fetch, _ = fake_fetch(rows())
+    # small pages split the rows sharing a `created_at`
+    pages = list(iter_cursor_pages(fetch, sizer=PageSizer(size=2)))
+
+    assert len(pages) > 1
+    assert pd.concat(pages)["id"].tolist() == rows()["id"].tolist()
+
+
+def test_page_size_adapts_to_the_responses():
+    sizer = PageSizer(size=200, target_latency=1.0, max_payload=1000)
+
+    sizer.observe(rows=200, elapsed=0.1, payload=100)
+    assert sizer.size == 400
+    sizer.observe(rows=400, elapsed=2.0, payload=100)
+    assert sizer.size == 200
+    sizer.observe(rows=200, elapsed=0.1, payload=2000)
+    assert sizer.size == pagination.MIN_PAGE_SIZE
+
+
+def test_failed_pages_are_retried_with_a_smaller_page():
+    fetch, calls = fake_fetch(rows(), fail=2)
+
+    pages = list(iter_cursor_pages(fetch, sizer=PageSizer(size=800)))
+
+    assert calls == [800, 400, 200]
+    assert pd.concat(pages)["id"].tolist() == rows()["id"].tolist()
+
+
+def test_pages_give_up_after_the_retries():
+    fetch, calls = fake_fetch(rows(), fail=10)
+
+    with pytest.raises(httpx.ConnectError):
+        list(iter_cursor_pages(fetch, retries=2))
+    assert len(calls) == 3
+
+
+def test_other_errors_are_not_retried():
+    def _fetch(cursor: Cursor | None, first: int) -> pd.DataFrame:
+        raise KeyError("created_at")
+
+    with pytest.raises(KeyError):
+        list(iter_cursor_pages(_fetch))
@@ -0,0 +1,54 @@
+import pandas as pd
+from farmer_store import plot_events
+from sketches import BucketedSketches, _add_harvested
+from sync import PlotChanges
+
+DAY = pd.Timedelta(days=1)
+
+
+def plots(**columns) -> pd.DataFrame:
+    created = pd.Timestamp("2025-01-01")
+    return pd.DataFrame(
+        {
+            "id": ["a", "b"],
+            "farmer": ["0x1", "0x2"],
+            "pods": [100.0, 50.0],
+            "pinto_spent_per_pod": [0.5, 0.25],
+            "harvested_pods": [0.0, 0.0],
+            "created_at": [created, created],
+            "updated_at": [created, created],
+            "harvest_at": pd.to_datetime([None, None]),
+        }
+        | columns
+    )
+
+
+def test_add_harvested_counts_harvested_plots():
+    harvested = plots(harvest_at=[pd.Timestamp("2025-01-03"), pd.NaT])
+    sketches = BucketedSketches()
+
+    _add_harvested(sketches, harvested)
+
+    window = sketches.window()
+    assert window.count == 1
+    assert abs(window.quantile(0.5) - 2 * DAY.total_seconds()) < 0.01 * 2 * 86400
+
+
+def test_plot_events_counts_sows_and_harvest_growth():
+    before = plots()
+    after = plots(
+        harvested_pods=[40.0, 0.0],
+        updated_at=[pd.Timestamp("2025-01-05")] * 2,
+        harvest_at=[pd.Timestamp("2025-01-05"), pd.NaT],
+    )
+    inserted = plots(id=["c", "d"], harvested_pods=[10.0, 0.0])
+
+    events = plot_events(PlotChanges(inserted, before, after))
+
+    sows = events[events["sows"] > 0]
+    assert sows["sown_pods"].tolist() == [100.0, 50.0]
+    assert sows["spent_pinto"].tolist() == [50.0, 12.5]
+
+    harvests = events[events["harvested_pods"] > 0]
+    assert harvests["farmer"].tolist() == ["0x1", "0x1"]
+    assert sorted(harvests["harvested_pods"]) == [10.0, 40.0]
@@ -0,0 +1,43 @@
+import os
+import time
+
+import pandas as pd
+from query_cache import MAX_TTL, RECENT_TTL, QueryCache
+
+
+def frame() -> pd.DataFrame:
+    return pd.DataFrame({"season": [1, 2, 3]})
+
+
+def test_open_block_is_not_served_once_closed(tmp_path):
+    cache = QueryCache(tmp_path)
+    calls = []
+
+    def _fetch():
+        calls.append(1)
+        return frame()
+
+    args = {"where": {"season_gte": 0, "season_lt": 1000}}
+    cache.fetch("url", "seasons", args, ["season"], _fetch, RECENT_TTL)
+    # the block closed, the entry written while it was open is refetched
+    cache.fetch("url", "seasons", args, ["season"], _fetch, None)
+    cache.fetch("url", "seasons", args, ["season"], _fetch, None)
+
+    assert len(calls) == 2
+
+
+def test_expired_entries_are_swept(tmp_path):
+    cache = QueryCache(tmp_path)
+    cache.put("old", frame(), RECENT_TTL)
+    cache.put("closed", frame(), None)
+    expired = time.time() - MAX_TTL - 1
+    for path in tmp_path.rglob("*.parquet"):
+        os.utime(path, (expired, expired))
+
+    cache._swept = 0.0
+    cache.put("new", frame(), RECENT_TTL)
+
+    assert sorted(path.name for path in tmp_path.rglob("*.parquet")) == [
+        "closed.parquet",
+        "new.parquet",
+    ]
@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+import pytest
+from silo_store import build_silo_prefix, silo_ranges
+
+
+def silo() -> pd.DataFrame:
+    seasons = np.arange(1, 5)
+    return pd.DataFrame(
+        {
+            "season": seasons,
+            "stalk": [100e4, 110e4, 121e4, 133.1e4],
+            "germinating_stalk": 0.0,
+            "grown_stalk_per_season": 1e4,
+            "roots": [1.0, 2.0, 3.0, 4.0],
+            "deposited_pdv": 10.0,
+            "active_silo_farmers": 3,
+            "flood_silo_pinto": 0.0,
+            "delta_pinto_minted": 1.0,
+        }
+    )
+
+
+def test_growth_is_measured_from_the_season_before_the_range():
+    ranges = silo_ranges(build_silo_prefix(silo()), [1, 2], [3, 4])
+
+    # nothing precedes the first season
+    assert np.isnan(ranges["stalk_growth"][0])
+    assert np.isnan(ranges["roots_growth"][0])
+    assert ranges["stalk_growth"][1] == pytest.approx(0.331)
+    assert ranges["minted_pinto"].tolist() == [3.0, 3.0]
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+from flood_store import calculate_flood_details, flood_state
+from simulate import FloodParameters, simulate_floods, summarize
+
+
+def seasons() -> pd.DataFrame:
+    # it rains from season 2 to 4 and floods on seasons 3 and 4
+    return pd.DataFrame(
+        {
+            "season": np.arange(1, 7),
+            "price": [1.0, 1.1, 1.2, 1.1, 0.9, 1.0],
+            "market_cap": 1e6,
+            "twa_delta_pinto": [-5.0, 10.0, 20.0, 30.0, -5.0, 5.0],
+            "pod_rate": 0.1,
+            "unharvestable_pods": 1e5,
+        }
+    )
+
+
+def test_summary_keeps_scenarios_without_floods():
+    params = [FloodParameters(), FloodParameters(delta_threshold=100)]
+
+    summary = summarize(simulate_floods(seasons(), params), params)
+
+    assert summary["delta_threshold"].tolist() == [0, 100]
+    assert summary["floods"].tolist() == [1, 0]
+    assert summary["flood_silo_pinto"].tolist() == [50.0, 0.0]
+
+
+def test_historical_parameters_reproduce_the_recorded_floods():
+    rng = np.random.default_rng(0)
+    n = 200
+    df = pd.DataFrame(
+        {
+            "season": np.arange(1, n + 1),
+            "price": rng.uniform(0.9, 1.1, n),
+            "market_cap": rng.uniform(1e6, 2e6, n),
+            "twa_delta_pinto": rng.normal(0, 100, n),
+            "pod_rate": rng.uniform(0, 0.1, n),
+            "unharvestable_pods": rng.uniform(0, 2e3, n),
+            "delta_pinto": 0.0,
+            "gm_reward": 0.0,
+            "twa_minted_pinto": 0.0,
+        }
+    )
+    # what the protocol records under its own rules
+    params = FloodParameters()
+    raining = (df["twa_delta_pinto"] > params.delta_threshold) & (
+        df["pod_rate"] > params.pod_rate_threshold
+    )
+    flooding = raining & raining.shift(fill_value=False)
+    supply = df["market_cap"] / df["price"]
+    df["raining"] = raining
+    df["flood_silo_pinto"] = np.where(flooding, df["twa_delta_pinto"], 0.0)
+    df["flood_field_pinto"] = np.where(
+        flooding,
+        np.minimum(df["unharvestable_pods"], params.field_cap * supply),
+        0.0,
+    )
+
+    recorded = calculate_flood_details(flood_state(df))
+    simulated = simulate_floods(df, [params])
+
+    assert len(recorded) > 3
+    assert simulated["flood"].tolist() == recorded.index.tolist()
+    for column in [
+        "raining_season",
+        "flood_length",
+        "average_price",
+        "flood_silo_pinto",
+        "flood_field_pinto",
+        "total_flood_pinto",
+    ]:
+        np.testing.assert_allclose(simulated[column], recorded[column])
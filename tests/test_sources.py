@@ -0,0 +1,24 @@
+from sources import RESIDENT_SNAPSHOTS, ResidentStores
+
+
+class Store:
+    def __init__(self, size: int):
+        self.size = size
+
+    def memory_usage(self) -> int:
+        return self.size
+
+
+def test_cached_snapshots_count_towards_the_budget():
+    stores = ResidentStores(budget=100)
+    stores.get("a", "plots", lambda: Store(40))
+    stores.get("b", "plots", lambda: Store(40))
+
+    # only the snapshots the cache still holds are counted, each measured once
+    for version in range(RESIDENT_SNAPSHOTS + 1):
+        stores.snapshot("b", str(version), lambda: 10)
+    stores.snapshot("b", str(RESIDENT_SNAPSHOTS), lambda: 1000)
+
+    assert stores.memory_usage("b") == 40 + 10 * RESIDENT_SNAPSHOTS
+    # the least recently used source went over the budget
+    assert stores.resident == ["b"]
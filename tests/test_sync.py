@@ -0,0 +1,88 @@
+import pandas as pd
+import pytest
+from sync import PlotStore, upsert_plots
+
+
+def frame() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "id": ["a", "b"],
+            "index": [0.0, 10.0],
+            "updated_at": pd.to_datetime([100, 200], unit="s"),
+        }
+    )
+
+
+def test_failing_subscriber_is_not_kept():
+    store = PlotStore()
+    store.sync(frame, lambda watermark: frame().iloc[:0])
+
+    def _fail(changes):
+        raise ValueError
+
+    with pytest.raises(ValueError):
+        store.subscribe(_fail)
+
+    # later syncs don't call the subscriber that failed its replay
+    store.sync(frame, lambda watermark: frame().iloc[:0])
+
+
+def test_seed_replays_to_subscribers():
+    store = PlotStore()
+    seen = []
+    store.subscribe(lambda changes: seen.append(len(changes.inserted)))
+
+    store.seed(frame())
+    store.seed(frame())
+
+    assert seen == [2]
+    assert store.plots["id"].tolist() == ["a", "b"]
+
+
+def test_upsert_updates_an_existing_plot_in_place():
+    plots = frame()
+    changed = pd.DataFrame(
+        {"id": ["b"], "index": [10.0], "updated_at": pd.to_datetime([300], unit="s")}
+    )
+
+    upserted, changes = upsert_plots(plots, changed)
+
+    assert upserted is plots
+    assert (
+        upserted["updated_at"].tolist() == pd.to_datetime([100, 300], unit="s").tolist()
+    )
+    assert changes.inserted.empty
+    assert changes.before["updated_at"].tolist() == [pd.Timestamp(200, unit="s")]
+    assert changes.after["updated_at"].tolist() == [pd.Timestamp(300, unit="s")]
+
+
+def test_upsert_inserts_new_plots_in_index_order():
+    changed = pd.DataFrame(
+        {
+            "id": ["d", "c"],
+            "index": [20.0, 5.0],
+            "updated_at": pd.to_datetime([300, 300], unit="s"),
+        }
+    )
+
+    upserted, changes = upsert_plots(frame(), changed)
+
+    assert upserted["id"].tolist() == ["a", "c", "b", "d"]
+    assert changes.inserted["id"].tolist() == ["c", "d"]
+    assert changes.before.empty
+
+
+def test_upsert_keeps_the_latest_update_of_a_plot():
+    # the latest version of a plot may arrive before an older one
+    changed = pd.DataFrame(
+        {
+            "id": ["b", "b"],
+            "index": [10.0, 10.0],
+            "updated_at": pd.to_datetime([400, 300], unit="s"),
+        }
+    )
+
+    upserted, changes = upsert_plots(frame(), changed)
+
+    assert upserted["updated_at"].iloc[1] == pd.Timestamp(400, unit="s")
+    assert changes.after["updated_at"].tolist() == [pd.Timestamp(400, unit="s")]
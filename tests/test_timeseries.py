@@ -0,0 +1,23 @@
+import pandas as pd
+from timeseries import MAX_PARTS, TimeSeriesStore
+
+
+def test_compaction_unifies_part_schemas(tmp_path):
+    store = TimeSeriesStore(tmp_path)
+    # the first part has no price yet and a null typed delta
+    store.append(pd.DataFrame({"timestamp": [1], "twa_delta_pinto": [None]}))
+    for timestamp in range(2, MAX_PARTS + 2):
+        store.append(
+            pd.DataFrame(
+                {
+                    "timestamp": [timestamp],
+                    "price": [1.0],
+                    "twa_delta_pinto": [0.5],
+                }
+            )
+        )
+
+    df = store.range(0, 100)
+    assert len(store._parts()) == 1
+    assert df["timestamp"].tolist() == list(range(1, MAX_PARTS + 2))
+    assert df["price"].isna().tolist() == [True] + [False] * MAX_PARTS